@@ -0,0 +1,48 @@
+# Color-dodge step of cute_drawing: NumPy implementation vs the original per-pixel loop.
+#   python benchmarks/bench_drawing.py [--sizes 1 12 24] [--repeat 3] [--skip-loop]
+import argparse
+
+from PIL import Image, ImageOps, ImageFilter
+
+from common import synthetic_image, time_call, median
+from retro_core import _color_dodge
+
+
+def color_dodge_loop(gray, blur):
+    g = gray.load()
+    b = blur.load()
+    out = Image.new('L', gray.size)
+    o = out.load()
+    for y in range(gray.size[1]):
+        for x in range(gray.size[0]):
+            gv = g[x, y]
+            bv = b[x, y]
+            if bv >= 255:
+                o[x, y] = 255
+            else:
+                o[x, y] = min(255, int((gv * 255) / max(1, 255 - bv)))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Color-dodge step of cute_drawing: NumPy vs the per-pixel loop")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 12, 24], help="megapixels")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-loop", action="store_true", help="only time the vectorized version")
+    args = parser.parse_args()
+
+    print(f"{'MP':>6} {'loop s':>10} {'numpy s':>10} {'speed-up':>10}  identical")
+    for mp in args.sizes:
+        gray = ImageOps.grayscale(synthetic_image(mp))
+        blur = ImageOps.invert(gray).filter(ImageFilter.GaussianBlur(radius=12))
+        fast = median(time_call(lambda: _color_dodge(gray, blur), args.repeat))
+        if args.skip_loop:
+            print(f"{mp:>6g} {'-':>10} {fast:>10.4f} {'-':>10}  -")
+            continue
+        slow = median(time_call(lambda: color_dodge_loop(gray, blur), 1))
+        same = color_dodge_loop(gray, blur).tobytes() == _color_dodge(gray, blur).tobytes()
+        print(f"{mp:>6g} {slow:>10.3f} {fast:>10.4f} {slow / fast:>9.0f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
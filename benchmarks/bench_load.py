@@ -0,0 +1,47 @@
+# Time to the first (256 px) and final (1600 px) preview source for a large JPEG: full decode plus
+# LANCZOS downscale, as load_image used to do, against SourceImage's draft() decode.
+#   python benchmarks/bench_load.py [--megapixels 50] [--quality 92] [--repeat 3]
+import os
+import argparse
+import tempfile
+
+from PIL import Image
+
+from common import synthetic_image, time_call, median
+from retro_core import SourceImage, downscale_for_preview_processing
+
+
+def _old(path, levels):
+    with Image.open(path) as im:
+        img = im.convert('RGB')
+    for side, gap in levels:
+        downscale_for_preview_processing(img, side, gap)
+
+
+def _new(path, levels):
+    src = SourceImage(path)
+    for side, gap in levels:
+        src.at_most(side, gap)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview latency of draft-mode JPEG loading")
+    parser.add_argument("--megapixels", type=float, default=50)
+    parser.add_argument("--quality", type=int, default=92)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "photo.jpg")
+        synthetic_image(args.megapixels).save(path, quality=args.quality)
+        print(f"{args.megapixels:g} MP JPEG, {os.path.getsize(path) / 2**20:.1f} MB")
+        first = [(256, 3.0)]
+        every = [(256, 3.0), (800, 3.0), (1600, None)]
+        for label, levels in (("first preview", first), ("all preview levels", every)):
+            t_old = median(time_call(lambda: _old(path, levels), args.repeat))
+            t_new = median(time_call(lambda: _new(path, levels), args.repeat))
+            print(f"{label:<20} full decode {t_old:6.2f} s   draft {t_new:6.2f} s   {t_old / t_new:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
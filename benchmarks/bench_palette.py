@@ -0,0 +1,63 @@
+# Palette generation for the bit-snapped adaptive styles: Pillow's median cut over every pixel
+# (quantize(method=0), the old path, which maps the pixels in the same call) vs histogram_palette, a median cut
+# over the snapped color cube's counts. Also reports the mean RGB error of mapping the image onto each palette.
+#   python benchmarks/bench_palette.py [--sizes 0.25 2 12 48] [--repeat 5] [-p 1]
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from common import synthetic_image, time_call, median
+from retro_core import (color_histogram, histogram_palette, pixelate, quantize_to_palette, snap_rgb_bits,
+                        apply_genesis_vdp_curve, adaptive_palette_index)
+
+# (label, colors, bits, step applied after the snap)
+CASES = [
+    ("RGB555 32 (GBC, PS1)", 32, 5, None),
+    ("RGB555 64 (GBA, N64)", 64, 5, None),
+    ("RGB555 256 (N64 CI8)", 256, 5, None),
+    ("RGB666 64 (DS)", 64, 6, None),
+    ("RGB333 64 (Genesis VDP)", 64, 3, apply_genesis_vdp_curve),
+]
+
+
+def pillow_palette(img, colors):
+    quant = img.quantize(colors=colors, method=0, dither=Image.NONE)
+    used = quant.getpalette()[:3 * len(quant.getcolors(256))]
+    return [tuple(used[i:i + 3]) for i in range(0, len(used), 3)]
+
+
+def mean_error(img, palette):
+    out = np.asarray(quantize_to_palette(img, adaptive_palette_index(palette), False), dtype=np.float64)
+    return float(np.sqrt(((out - np.asarray(img, dtype=np.float64)) ** 2).sum(axis=-1)).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Palette generation for the bit-snapped adaptive styles: median cut vs histogram")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.25, 2, 12, 48], help="megapixels")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-p", "--pixel-size", type=int, default=1, help="pixelate the input first")
+    args = parser.parse_args()
+
+    print(f"{'case':<24} {'MP':>6} {'distinct':>8} {'median cut ms':>14} {'histogram ms':>13} {'speed-up':>9} "
+          f"{'error old':>10} {'error new':>10}")
+    for mp in args.sizes:
+        img = synthetic_image(mp)
+        if args.pixel_size > 1:
+            img = pixelate(img, args.pixel_size)
+        for label, colors, bits, after in CASES:
+            work = snap_rgb_bits(img, bits)
+            if after is not None:
+                work = after(work)
+            distinct = int(np.count_nonzero(color_histogram(work, bits)))
+            t_old = median(time_call(lambda: pillow_palette(work, colors), args.repeat)) * 1000
+            t_new = median(time_call(lambda: histogram_palette(work, colors, bits), args.repeat)) * 1000
+            e_old = mean_error(work, pillow_palette(work, colors))
+            e_new = mean_error(work, histogram_palette(work, colors, bits))
+            print(f"{label:<24} {mp:>6g} {distinct:>8} {t_old:>14.1f} {t_new:>13.1f} {t_old / t_new:>8.1f}x "
+                  f"{e_old:>10.2f} {e_new:>10.2f}")
+            del work
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Per-call time of the bit-depth snaps and the Genesis VDP curve: 768-entry point() tables vs the
+# original split / per-channel Python callback / merge implementation.
+#   python benchmarks/bench_snap.py [--sizes 0.25 2 12] [--repeat 5]
+import argparse
+
+from PIL import Image
+
+from common import synthetic_image, time_call, median
+from retro_core import GENESIS_LEVELS, snap_rgb333, snap_rgb555, snap_rgb666, apply_genesis_vdp_curve
+
+
+def _old_snap(img, bits):
+    levels = (1 << bits) - 1
+
+    def _map(v):
+        return int(round((v / 255.0) * levels)) * (255 // levels)
+
+    r, g, b = img.convert('RGB').split()
+    return Image.merge('RGB', (r.point(_map), g.point(_map), b.point(_map)))
+
+
+def _old_genesis(img):
+    lut = []
+    for v in range(256):
+        lut.append(min(GENESIS_LEVELS, key=lambda x: abs(x - v)))
+    r, g, b = img.convert('RGB').split()
+    return Image.merge('RGB', (r.point(lut), g.point(lut), b.point(lut)))
+
+
+CASES = [
+    ("snap_rgb333", snap_rgb333, lambda img: _old_snap(img, 3)),
+    ("snap_rgb555", snap_rgb555, lambda img: _old_snap(img, 5)),
+    ("snap_rgb666", snap_rgb666, lambda img: _old_snap(img, 6)),
+    ("apply_genesis_vdp_curve", apply_genesis_vdp_curve, _old_genesis),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-call time of the bit-depth snaps and the Genesis VDP curve")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.25, 2, 12], help="megapixels")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'function':<26} {'MP':>6} {'old ms':>10} {'new ms':>10} {'speed-up':>9}  identical")
+    for mp in args.sizes:
+        img = synthetic_image(mp)
+        for name, new, old in CASES:
+            t_old = median(time_call(lambda: old(img), args.repeat)) * 1000
+            t_new = median(time_call(lambda: new(img), args.repeat)) * 1000
+            same = old(img).tobytes() == new(img).tobytes()
+            print(f"{name:<26} {mp:>6g} {t_old:>10.2f} {t_new:>10.2f} {t_old / t_new:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
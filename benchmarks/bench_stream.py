@@ -0,0 +1,93 @@
+# Peak memory of the strip renderer (retro_stream.stream_style) against the in-memory apply_style path
+# as the input grows. Every measurement runs in a fresh process so ru_maxrss is its own peak.
+#   python benchmarks/bench_stream.py [--sizes 4 16 64 256] [--in-memory-max 64] [--style PICO-8] [--pixel-size 8]
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+from common import peak_rss_mb
+
+
+def write_synthetic_ppm(path, megapixels, seed=0, strip_rows=256):
+    """Same kind of gradient-plus-noise picture as common.synthetic_image, written strip by strip."""
+    w = max(1, int(round(math.sqrt(megapixels * 1e6 * 4 / 3))))
+    h = max(1, int(round(w * 3 / 4)))
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 1.0, w, dtype=np.float32)[None, :]
+    with open(path, "wb") as fp:
+        fp.write(b"P6\n%d %d\n255\n" % (w, h))
+        for y0 in range(0, h, strip_rows):
+            y = np.arange(y0, min(h, y0 + strip_rows), dtype=np.float32)[:, None] / max(1, h - 1)
+            r = 255 * x * np.ones_like(y)
+            g = 255 * y * np.ones_like(x)
+            b = 127.5 * (1 + np.sin(12 * x + 7 * y))
+            rgb = np.stack([r, g, b], axis=-1) + rng.normal(0, 18, r.shape + (3,)).astype(np.float32)
+            fp.write(np.clip(rgb, 0, 255).astype(np.uint8).tobytes())
+    return w, h
+
+
+def _child(mode, src, dst, style, pixel_size):
+    from retro_core import apply_style
+    from retro_stream import stream_style
+
+    start = time.perf_counter()
+    if mode == "stream":
+        stream_style(src, dst, style, pixel_size)
+    else:
+        with Image.open(src) as im:
+            apply_style(im.convert('RGB'), style, pixel_size, False).save(dst)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb()}))
+
+
+def _measure(mode, src, dst, style, pixel_size):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, src, dst, style, str(pixel_size)],
+                         capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(f"{mode} render failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        _child(sys.argv[2], sys.argv[3], sys.argv[4], sys.argv[5], int(sys.argv[6]))
+        return
+
+    parser = argparse.ArgumentParser(description="Peak RSS of streamed vs in-memory rendering")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[4, 16, 64, 256], help="megapixels")
+    parser.add_argument("--in-memory-max", type=float, default=64,
+                        help="largest size also rendered in memory for comparison (MP)")
+    parser.add_argument("--style", default="PICO-8 (16 colors)")
+    parser.add_argument("--pixel-size", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'MP':>6} {'size':>13} {'stream MB':>10} {'stream s':>9} {'memory MB':>10} {'memory s':>9}  identical")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mp in args.sizes:
+            src = os.path.join(tmp, f"in_{mp:g}.ppm")
+            w, h = write_synthetic_ppm(src, mp)
+            streamed = os.path.join(tmp, f"stream_{mp:g}.png")
+            s = _measure("stream", src, streamed, args.style, args.pixel_size)
+            row = f"{mp:>6g} {f'{w}x{h}':>13} {s['peak_mb']:>10.0f} {s['seconds']:>9.2f}"
+            if mp <= args.in_memory_max:
+                in_memory = os.path.join(tmp, f"memory_{mp:g}.png")
+                m = _measure("memory", src, in_memory, args.style, args.pixel_size)
+                with Image.open(streamed) as a, Image.open(in_memory) as b:
+                    same = a.tobytes() == b.tobytes()
+                row += f" {m['peak_mb']:>10.0f} {m['seconds']:>9.2f}  {same}"
+                os.remove(in_memory)
+            print(row, flush=True)
+            os.remove(src)
+            os.remove(streamed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Time apply_style and apply_cute_mode for every style x dither x cute mode on synthetic inputs of several sizes,
+# reporting median, p95 and peak memory per case. Results go to JSON; --compare checks them against an earlier
+# run and exits 1 when a case got slower (or bigger) than --tolerance allows, so it can gate a change.
+#   python benchmarks/bench_suite.py -o base.json                       # full matrix, 0.25 / 2 / 12 / 48 MP
+#   python benchmarks/bench_suite.py --sizes 0.25 2 -s PICO -c CRT -c Drawing -o new.json --compare base.json
+#   python benchmarks/bench_suite.py --load new.json --compare base.json  # compare two saved runs
+import sys
+import json
+import time
+import argparse
+import platform
+
+import numpy as np
+import PIL
+
+from common import synthetic_image, median, percentile, peak_rss_mb, release_memory, reset_peak_rss, rss_mb
+from retro_core import STYLES, CUTE_MODES, apply_style, apply_cute_mode
+from retro_cli import resolve_style, resolve_cute_mode, resolve_dither
+
+DEFAULT_SIZES = (0.25, 2, 12, 48)
+# memory growth below this many MB is noise, whatever the tolerance
+MEMORY_SLACK_MB = 4.0
+
+
+def _measure(fn, repeat, warmup):
+    """(wall times, peak RSS above the level before each call in MB or None, last result) of repeat calls of fn."""
+    for _ in range(warmup):
+        fn()
+    times, peak, out = [], None, None
+    for _ in range(max(1, repeat)):
+        out = None
+        release_memory()
+        base = rss_mb()
+        can_reset = base is not None and reset_peak_rss()
+        start = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - start)
+        if can_reset:
+            peak = max(peak or 0.0, peak_rss_mb() - base)
+    return times, peak, out
+
+
+def _case(size, img, style, dither, cute_mode, stage, times, peak):
+    return {
+        "size_mp": size, "width": img.width, "height": img.height,
+        "style": style, "dither": dither, "cute_mode": cute_mode, "stage": stage,
+        "median_s": median(times), "p95_s": percentile(times, 95), "peak_mb": peak, "runs": len(times),
+    }
+
+
+def _case_key(case):
+    return case["size_mp"], case["style"], case["dither"], case["cute_mode"], case["stage"]
+
+
+def _print_case(case):
+    peak = "-" if case["peak_mb"] is None else f"{case['peak_mb']:.0f}"
+    print(f"{case['size_mp']:>6g} {case['stage']:<5} {case['style'][:28]:<28} {case['dither'][:15]:<15} "
+          f"{case['cute_mode']:<16} {case['median_s'] * 1000:>10.1f} {case['p95_s'] * 1000:>10.1f} {peak:>8}",
+          flush=True)
+
+
+def run_suite(sizes, styles, dithers, cute_modes, pixel_size, repeat, warmup):
+    print(f"{'MP':>6} {'stage':<5} {'style':<28} {'dither':<15} {'cute mode':<16} {'median ms':>10} {'p95 ms':>10} "
+          f"{'peak MB':>8}")
+    cases = []
+    for size in sizes:
+        img = synthetic_image(size)
+        for style in styles:
+            for dither in dithers:
+                times, peak, styled = _measure(lambda: apply_style(img, style, pixel_size, dither), repeat, warmup)
+                cases.append(_case(size, img, style, dither, "None", "style", times, peak))
+                _print_case(cases[-1])
+                for mode in cute_modes:
+                    if mode == "None":
+                        continue
+                    times, peak, _ = _measure(lambda: apply_cute_mode(styled, mode), repeat, warmup)
+                    cases.append(_case(size, img, style, dither, mode, "cute", times, peak))
+                    _print_case(cases[-1])
+                del styled
+        del img
+    return cases
+
+
+def compare(results, baseline, tolerance):
+    """Print every case that changed by more than tolerance; returns the number of regressions."""
+    base = {_case_key(c): c for c in baseline["cases"]}
+    regressions = 0
+    print(f"\n{'MP':>6} {'stage':<5} {'style':<28} {'dither':<15} {'cute mode':<16} {'time':>7} {'memory':>8}")
+    for case in results["cases"]:
+        old = base.pop(_case_key(case), None)
+        if old is None:
+            continue
+        t_ratio = case["median_s"] / max(old["median_s"], 1e-9)
+        m_delta, m_grew = None, False
+        if case["peak_mb"] is not None and old["peak_mb"] is not None:
+            m_delta = case["peak_mb"] - old["peak_mb"]
+            m_grew = case["peak_mb"] - old["peak_mb"] > max(MEMORY_SLACK_MB, old["peak_mb"] * tolerance)
+        slower = t_ratio > 1 + tolerance
+        if slower or m_grew or t_ratio < 1 - tolerance:
+            regressions += slower or m_grew
+            mem = "-" if m_delta is None else f"{m_delta:+.0f} MB"
+            flag = "  REGRESSION" if slower or m_grew else ""
+            print(f"{case['size_mp']:>6g} {case['stage']:<5} {case['style'][:28]:<28} {case['dither'][:15]:<15} "
+                  f"{case['cute_mode']:<16} {t_ratio:>6.2f}x {mem:>8}{flag}")
+    if base:
+        print(f"{len(base)} baseline case(s) were not run")
+    print(f"{regressions} regression(s) beyond {tolerance:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every style x dither x cute mode x input size")
+    parser.add_argument("--sizes", type=float, nargs="+", default=list(DEFAULT_SIZES), help="megapixels")
+    parser.add_argument("-s", "--style", action="append", help="style name or prefix, repeatable (default: all)")
+    parser.add_argument("-c", "--cute-mode", action="append", help="cute mode, repeatable (default: all)")
+    parser.add_argument("-d", "--dither", action="append",
+                        help="dither mode, repeatable (default: none and fs)")
+    parser.add_argument("-p", "--pixel-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per case (fills the lru caches)")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--load", help="compare this saved result file instead of running the suite")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown / memory growth before a case counts as a regression")
+    args = parser.parse_args()
+
+    try:
+        styles = [s for name in args.style or ["all"] for s in resolve_style(name)]
+        cute_modes = [m for name in args.cute_mode or ["all"] for m in resolve_cute_mode(name)]
+        dithers = [resolve_dither(name) for name in args.dither or ["none", "fs"]]
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.load:
+        with open(args.load) as fp:
+            results = json.load(fp)
+    else:
+        cases = run_suite(args.sizes, list(dict.fromkeys(styles)), list(dict.fromkeys(dithers)),
+                          list(dict.fromkeys(cute_modes)), args.pixel_size, args.repeat, args.warmup)
+        results = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                "pillow": PIL.__version__, "numpy": np.__version__, "machine": platform.platform(),
+                "pixel_size": args.pixel_size, "repeat": args.repeat, "warmup": args.warmup,
+                "styles": len(STYLES), "cute_modes": len(CUTE_MODES),
+            },
+            "cases": cases,
+        }
+        if args.output:
+            with open(args.output, "w") as fp:
+                json.dump(results, fp, indent=1)
+            print(f"{len(cases)} case(s) written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        sys.exit(1 if compare(results, baseline, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
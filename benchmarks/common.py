@@ -0,0 +1,99 @@
+# Shared helpers for the benchmark scripts in this folder.
+import os
+import gc
+import sys
+import math
+import ctypes
+import ctypes.util
+import time
+import resource
+import statistics
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def synthetic_image(megapixels: float, seed=0) -> Image.Image:
+    """Deterministic 4:3 RGB test image: smooth gradients plus noise, so palettes and blurs have work to do."""
+    w = max(1, int(round(math.sqrt(megapixels * 1e6 * 4 / 3))))
+    h = max(1, int(round(w * 3 / 4)))
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0.0, 1.0, w, dtype=np.float32)[None, :]
+    y = np.linspace(0.0, 1.0, h, dtype=np.float32)[:, None]
+    r = 255 * x * np.ones_like(y)
+    g = 255 * y * np.ones_like(x)
+    b = 127.5 * (1 + np.sin(12 * x + 7 * y))
+    rgb = np.stack([r, g, b], axis=-1) + rng.normal(0, 18, (h, w, 3)).astype(np.float32)
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), 'RGB')
+
+
+def time_call(fn, repeat=3):
+    """Run fn repeat times and return the list of wall times in seconds."""
+    times = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def median(times):
+    return statistics.median(times)
+
+
+def percentile(times, q):
+    """q-th percentile (0-100) of times, interpolating between the two nearest samples."""
+    ordered = sorted(times)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _proc_status_mb(field):
+    try:
+        with open("/proc/self/status") as fp:
+            for line in fp:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    # Linux: VmHWM belongs to this process image only; ru_maxrss also counts the parent it was forked from
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20  # bytes on macOS
+
+
+def reset_peak_rss() -> bool:
+    """Restart the peak RSS count at the current RSS (Linux only); False if the peak cannot be reset."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fp:
+            fp.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb():
+    return _proc_status_mb("VmRSS")
+
+
+def release_memory():
+    """Hand freed memory back to the OS so the next peak RSS reading starts from what is really in use."""
+    Image.core.set_blocks_max(0)  # Pillow otherwise keeps freed image blocks for reuse
+    gc.collect()
+    libc = ctypes.util.find_library("c")
+    if libc and sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL(libc).malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
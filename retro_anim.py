@@ -0,0 +1,117 @@
+# Multi-frame input (animated GIF, APNG, animated WebP, multi-page TIFF): every frame goes through
+# apply_style / apply_cute_mode on the render engine and the results are written back as an animation.
+import os
+
+from PIL import Image, ImageSequence
+
+from retro_core import ADAPTIVE_STYLES, pixel_grid, reduce_colors
+from retro_engine import RenderEngine, RenderJob
+
+ANIMATED_FORMATS = (".gif", ".png", ".webp", ".tif", ".tiff")
+DEFAULT_FRAME_MS = 100
+# frames decoded ahead per worker; bounds memory for long animations
+FRAMES_PER_WORKER = 4
+# frames whose pixel grids feed a shared palette; longer animations are sampled evenly
+PALETTE_SAMPLE_FRAMES = 64
+
+
+def frame_count(path: str) -> int:
+    with Image.open(path) as im:
+        return getattr(im, "n_frames", 1)
+
+
+def iter_frames(path: str):
+    """Yield (RGB frame, duration in ms) one frame at a time."""
+    with Image.open(path) as im:
+        for frame in ImageSequence.Iterator(im):
+            yield frame.convert('RGB'), int(frame.info.get("duration") or DEFAULT_FRAME_MS)
+
+
+def shared_palette(frames, style: str, pixel_size: int, options=None):
+    """One palette for every frame of an adaptive style, or None if the style has a fixed palette.
+
+    The style's own color reduction runs once over the pixel grids of the frames stacked into one image,
+    so the palette is the one it would pick for the whole animation. frames may be any iterable.
+    """
+    if style not in ADAPTIVE_STYLES:
+        return None
+    options = {k: v for k, v in (options or {}).items() if k not in ("grid_space", "adaptive_palette")}
+    grids, step = [], 1
+    for i, frame in enumerate(frames):
+        if i % step:
+            continue
+        grids.append(pixel_grid(frame, pixel_size))
+        if len(grids) > PALETTE_SAMPLE_FRAMES:
+            grids, step = grids[::2], step * 2
+    if not grids:
+        return None
+    stacked = Image.new('RGB', (max(g.width for g in grids), sum(g.height for g in grids)))
+    y = 0
+    for grid in grids:
+        stacked.paste(grid, (0, y))
+        y += grid.height
+    reduced = reduce_colors(stacked, style, False, grid_space=True, pixel_size=pixel_size, **options)
+    colors = reduced.getcolors(256)
+    # PS1 Movie mode keeps full color, so there is nothing to share
+    return None if colors is None else [rgb for _, rgb in colors]
+
+
+def save_animation(frames, durations, out_path: str, loop=0):
+    ext = os.path.splitext(out_path)[1].lower()
+    if ext not in ANIMATED_FORMATS:
+        raise ValueError("Animations can be saved as " + ", ".join(ANIMATED_FORMATS))
+    first, rest = frames[0], list(frames[1:])
+    if ext in (".tif", ".tiff"):
+        first.save(out_path, save_all=True, append_images=rest)
+    elif ext == ".webp":
+        first.save(out_path, save_all=True, append_images=rest, duration=list(durations), loop=loop, lossless=True)
+    else:
+        first.save(out_path, save_all=True, append_images=rest, duration=list(durations), loop=loop)
+
+
+def render_animation(path: str, out_path: str, style: str, pixel_size: int, dither, options=None,
+                     cute_mode="None", share_palette=False, engine=None, progress=None) -> int:
+    """Render every frame of path and save them to out_path as an animation; returns the frame count.
+
+    Frames are decoded lazily and rendered a batch at a time on engine (a new one per CPU by default),
+    keeping their order. With share_palette the adaptive styles use one palette for all frames, so colors
+    do not flicker. progress(done, total) is called after each frame.
+    """
+    options = dict(options or {})
+    if share_palette:
+        options["adaptive_palette"] = shared_palette((f for f, _ in iter_frames(path)), style, pixel_size, options)
+    with Image.open(path) as im:
+        loop = im.info.get("loop", 0)
+        total = getattr(im, "n_frames", 1)
+
+    own_engine = engine is None
+    engine = engine or RenderEngine()
+    frames, durations, batch = [], [], []
+
+    def flush():
+        jobs = [RenderJob(frame, style, pixel_size, dither, options, cute_mode) for frame in batch]
+        base = len(frames)
+
+        def report(done, *_):
+            if progress is not None:
+                progress(base + done, total)
+
+        for result in engine.run(jobs, progress=report):
+            if result.error is not None:
+                raise result.error
+            frames.append(result.image)
+        batch.clear()
+
+    try:
+        for frame, duration in iter_frames(path):
+            batch.append(frame)
+            durations.append(duration)
+            if len(batch) >= engine.max_workers * FRAMES_PER_WORKER:
+                flush()
+        if batch:
+            flush()
+    finally:
+        if own_engine:
+            engine.shutdown()
+    save_animation(frames, durations, out_path, loop)
+    return len(frames)
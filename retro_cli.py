@@ -0,0 +1,377 @@
+# Headless command line front-end for RetroImageMaker.
+#   python RetroImageMaker.py convert photos/ shot.png "scans/*.jpg" -o out --style all --cute-mode CRT
+#   python RetroImageMaker.py stream scan.tif -o scan_pico.png --style PICO-8 --pixel-size 16
+#   python RetroImageMaker.py sequence clip.mp4 -o clip_gba.mp4 --style "Game Boy Advance" --pixel-size 6
+# Runs the same apply_style / apply_cute_mode pipeline as the GUI without importing tkinter.
+import os
+import sys
+import glob
+import time
+import logging
+import argparse
+
+from retro_core import STYLES, STYLE_REGISTRY, CUTE_MODES, DITHER_MODES, BAYER_SIZES, IMAGE_EXTENSIONS, load_palette_file, style_file_stem
+import retro_profile
+from retro_engine import RenderEngine, RenderJob, RenderResult, default_worker_count, output_stems
+from retro_anim import ANIMATED_FORMATS, frame_count, render_animation
+from retro_stream import STREAMABLE_STYLES, stream_style
+from retro_palettes import PaletteLibrary
+from retro_sequence import (VIDEO_EXTENSIONS, SCENE_THRESHOLD, FolderSink, VideoSink, iter_image_sequence,
+                            iter_video_frames, probe_video, render_sequence)
+
+COMMANDS = ("convert", "stream", "sequence")
+OUTPUT_FORMATS = ("png", "jpg", "bmp", "gif", "webp", "tif")
+N64_MODES = ("RGBA5551", "CI8", "CI4")
+
+
+def resolve_style(name: str):
+    """Match a style by full name or short key (gba, ps1, ...), case-insensitively, or by a unique prefix
+    ("all" selects every style)."""
+    key = name.strip().lower()
+    if key == "all":
+        return list(STYLES)
+    for style in STYLES:
+        if style.lower() == key or STYLE_REGISTRY[style].key == key:
+            return [style]
+    matches = [s for s in STYLES if s.lower().startswith(key)]
+    if len(matches) == 1:
+        return matches
+    if not matches:
+        raise ValueError(f"Unknown style '{name}'")
+    raise ValueError(f"Ambiguous style '{name}': " + ", ".join(matches))
+
+
+def resolve_cute_mode(name: str):
+    key = name.strip().lower()
+    if key == "all":
+        return list(CUTE_MODES)
+    for mode in CUTE_MODES:
+        if mode.lower() == key:
+            return [mode]
+    raise ValueError(f"Unknown cute mode '{name}'")
+
+
+def resolve_dither(name: str) -> str:
+    """Dither mode by name, ignoring case, spaces and dashes: none, fs / floyd-steinberg, bayer2 .. bayer8x8."""
+    key = "".join(ch for ch in name.lower() if ch.isalnum())
+    aliases = {"fs": "Floyd-Steinberg"}
+    for mode in DITHER_MODES:
+        norm = "".join(ch for ch in mode.lower() if ch.isalnum())
+        aliases[norm] = mode
+        if mode.startswith("Bayer"):
+            aliases[norm[:-2]] = mode  # bayer4x4 -> bayer4
+    if key not in aliases:
+        raise ValueError(f"Unknown dither mode '{name}' (choose from: " + ", ".join(DITHER_MODES) + ")")
+    return aliases[key]
+
+
+def _is_image(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _is_animated(path: str) -> bool:
+    try:
+        return frame_count(path) > 1
+    except Exception:
+        return False  # the render reports the error
+
+
+def iter_input_paths(inputs, recursive=False):
+    """Yield (path, relative_dir) for every image named by files, directories or glob patterns."""
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                found = []
+                for dirpath, dirnames, filenames in os.walk(item):
+                    dirnames.sort()
+                    found += [os.path.join(dirpath, f) for f in sorted(filenames)]
+            else:
+                found = [os.path.join(item, f) for f in sorted(os.listdir(item))]
+            entries = [(p, os.path.relpath(os.path.dirname(p), item)) for p in found if os.path.isfile(p) and _is_image(p)]
+        elif glob.has_magic(item):
+            entries = [(p, "") for p in sorted(glob.glob(item, recursive=recursive)) if os.path.isfile(p) and _is_image(p)]
+        else:
+            entries = [(item, "")]
+        for path, rel in entries:
+            key = os.path.abspath(path)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield path, ("" if rel == os.curdir else rel)
+
+
+def _add_style_arguments(parser):
+    parser.add_argument("-p", "--pixel-size", type=int, default=12)
+    parser.add_argument("-d", "--dither", action="store_const", const="Floyd-Steinberg", default="None",
+                        help="Floyd-Steinberg dithering")
+    parser.add_argument("--dither-mode", dest="dither", metavar="MODE",
+                        help="none, fs, bayer2, bayer4 or bayer8 (ordered dithers also work with stream)")
+    parser.add_argument("--nes-emphasis", default="", metavar="RGB",
+                        help="NES emphasis channels, any of the letters r, g, b")
+    parser.add_argument("--genesis-vdp", action="store_true", help="Genesis non-linear VDP levels")
+    parser.add_argument("--ps1-movie", action="store_true", help="PS1 24-bit Movie mode")
+    parser.add_argument("--n64-mode", choices=N64_MODES, default="RGBA5551")
+    parser.add_argument("--palette", help="palette file (.gpl, .pal, .act, .ase, .hex) or the name of a saved palette, "
+                                           "for 'Custom Palette (User)'")
+    parser.add_argument("--profile", metavar="JSON",
+                        help="write per-stage timings to this file ('-' for stderr); renders in this process")
+    parser.add_argument("--profile-log", action="store_true", help="log every timed stage as a JSON line on stderr")
+    parser.add_argument("--profile-alloc", action="store_true", help="also track memory allocated per stage (alone, reports to stderr as --profile -)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="RetroImageMaker.py", description="RetroImageMaker headless tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    conv = sub.add_parser("convert", help="convert images without starting the GUI")
+    conv.add_argument("inputs", nargs="+", help="image files, directories or glob patterns")
+    conv.add_argument("-o", "--output-dir", required=True, help="folder for the converted images")
+    conv.add_argument("-s", "--style", action="append", default=None,
+                      help="style name or unique prefix, repeatable; 'all' renders every style (default: PICO-8)")
+    _add_style_arguments(conv)
+    conv.add_argument("-g", "--grid-space", action="store_true",
+                      help="do palette and bit-depth work on the pixel grid, upscale once at the end")
+    conv.add_argument("-c", "--cute-mode", action="append", default=None,
+                      help="cute mode, repeatable; 'all' renders every mode (default: None)")
+    conv.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="png",
+                      help="gif, png (APNG), webp and tif keep every frame of animated inputs")
+    conv.add_argument("--global-palette", action="store_true",
+                      help="adaptive styles use one palette for all frames of an animation")
+    conv.add_argument("-r", "--recursive", action="store_true", help="descend into sub-directories")
+    conv.add_argument("--skip-existing", action="store_true", help="leave outputs that already exist untouched")
+    conv.add_argument("-j", "--jobs", type=int, default=default_worker_count(),
+                      help="worker processes (default: one per CPU)")
+    conv.add_argument("-q", "--quiet", action="store_true")
+
+    strm = sub.add_parser("stream", help="render one huge image strip by strip in constant memory")
+    strm.add_argument("input", help="uncompressed BMP, PPM/PGM or TIFF")
+    strm.add_argument("-o", "--output", required=True, help=".png or .ppm file to write")
+    strm.add_argument("-s", "--style", default=STYLES[0],
+                      help="fixed-palette style name or unique prefix (default: PICO-8)")
+    _add_style_arguments(strm)
+    strm.add_argument("-q", "--quiet", action="store_true")
+
+    seq = sub.add_parser("sequence", help="render a video or a folder of numbered frames in order")
+    seq.add_argument("input", help="video file (decoded by ffmpeg), folder or glob of numbered images")
+    seq.add_argument("-o", "--output", required=True,
+                     help="video file (encoded by ffmpeg) or folder for numbered PNG frames")
+    seq.add_argument("-s", "--style", default=STYLES[0], help="style name or unique prefix (default: PICO-8)")
+    _add_style_arguments(seq)
+    seq.add_argument("-c", "--cute-mode", default="None", help="cute mode (default: None)")
+    seq.add_argument("--fps", type=float, help="output frame rate (default: the input video's, else 24)")
+    seq.add_argument("--scene-threshold", type=float, default=SCENE_THRESHOLD,
+                     help="color change (0-1) that makes adaptive styles pick a new palette; "
+                          f"0 picks one whenever the colors change at all (default: {SCENE_THRESHOLD})")
+    seq.add_argument("--queue", type=int, help="frames in flight at once (default: two per worker)")
+    seq.add_argument("-j", "--jobs", type=int, default=default_worker_count(),
+                     help="worker processes (default: one per CPU)")
+    seq.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg executable")
+    seq.add_argument("--ffprobe", default="ffprobe", help="ffprobe executable")
+    seq.add_argument("-q", "--quiet", action="store_true")
+    return parser
+
+
+def _conversion_jobs(args):
+    styles = []
+    for name in args.style or [STYLES[0]]:
+        styles += [s for s in resolve_style(name) if s not in styles]
+    cute_modes = []
+    for name in args.cute_mode or ["None"]:
+        cute_modes += [m for m in resolve_cute_mode(name) if m not in cute_modes]
+    return [(style, mode) for style in styles for mode in cute_modes]
+
+
+def _custom_palette(name_or_path: str):
+    if os.path.isfile(name_or_path):
+        return load_palette_file(name_or_path)
+    library = PaletteLibrary()
+    if name_or_path not in library:
+        raise ValueError(f"No palette file or saved palette named '{name_or_path}' (library: {library.folder})")
+    return library[name_or_path]
+
+
+def _style_options(args):
+    emphasis = args.nes_emphasis.lower()
+    if set(emphasis) - set("rgb"):
+        raise ValueError("--nes-emphasis only accepts the letters r, g and b")
+    custom_pal = _custom_palette(args.palette) if args.palette else None
+    return dict(
+        nes_r="r" in emphasis, nes_g="g" in emphasis, nes_b="b" in emphasis,
+        genesis_vdp=args.genesis_vdp, ps1_movie=args.ps1_movie,
+        n64_mode=args.n64_mode, custom_palette=custom_pal, grid_space=getattr(args, "grid_space", False),
+    )
+
+
+def convert(args) -> int:
+    try:
+        jobs = _conversion_jobs(args)
+        options = _style_options(args)
+        dither = resolve_dither(args.dither)
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    render_jobs = []
+    animations = []
+    keep_frames = f".{args.format}" in ANIMATED_FORMATS
+    for path, rel_dir, stem in output_stems(iter_input_paths(args.inputs, args.recursive)):
+        out_dir = os.path.join(args.output_dir, rel_dir)
+        if stem != os.path.splitext(os.path.basename(path))[0] and not args.quiet:
+            print(f"note: {path} shares its name with another input, written as {stem}__…", file=sys.stderr)
+        target = animations if keep_frames and _is_animated(path) else render_jobs
+        for style, mode in jobs:
+            out_path = os.path.join(out_dir, f"{stem}__{style_file_stem(style, mode)}.{args.format}")
+            if args.skip_existing and os.path.exists(out_path):
+                continue
+            os.makedirs(out_dir, exist_ok=True)
+            target.append(RenderJob(path, style, args.pixel_size, dither, options, mode, out_path))
+
+    counts = {"done": 0, "failed": 0}
+
+    def report(job, result):
+        if result.error is not None:
+            counts["failed"] += 1
+            print(f"{job.source} [{job.style} / {job.cute_mode}]: {result.error}", file=sys.stderr)
+        else:
+            counts["done"] += 1
+            if not args.quiet:
+                print(result.path)
+
+    started = time.perf_counter()
+    engine = RenderEngine(args.jobs)
+    try:
+        engine.run(render_jobs, progress=lambda done, total, index, result: report(render_jobs[index], result))
+        # animations go one at a time, their frames spread over the workers
+        for job in animations:
+            try:
+                render_animation(job.source, job.out_path, job.style, job.pixel_size, job.dither, job.options,
+                                 job.cute_mode, args.global_palette, engine)
+                report(job, RenderResult(None, job.out_path, None))
+            except Exception as e:
+                report(job, RenderResult(None, None, e))
+    finally:
+        engine.shutdown()
+    done, failed = counts["done"], counts["failed"]
+
+    if not args.quiet:
+        elapsed = time.perf_counter() - started
+        print(f"{done} image(s) written, {failed} failed in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def stream(args) -> int:
+    try:
+        styles = resolve_style(args.style)
+        if len(styles) != 1 or styles[0] not in STREAMABLE_STYLES:
+            raise ValueError("stream needs one fixed-palette style: " + ", ".join(STREAMABLE_STYLES))
+        options = _style_options(args)
+        dither = resolve_dither(args.dither)
+        if dither not in ("None",) + tuple(BAYER_SIZES):
+            raise ValueError("stream only supports the Bayer dithers")
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    def progress(rows, total):
+        if not args.quiet:
+            print(f"\r{rows * 100 // total:3d}%", end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    try:
+        stream_style(args.input, args.output, styles[0], args.pixel_size, options, progress=progress, dither=dither)
+    except Exception as e:
+        print(("" if args.quiet else "\n") + f"error: {e}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(f"\r{args.output} written in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+def _is_video(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in VIDEO_EXTENSIONS
+
+
+def sequence(args) -> int:
+    try:
+        styles = resolve_style(args.style)
+        if len(styles) != 1:
+            raise ValueError("sequence needs one style")
+        modes = resolve_cute_mode(args.cute_mode)
+        if len(modes) != 1:
+            raise ValueError("sequence needs one cute mode")
+        options = _style_options(args)
+        dither = resolve_dither(args.dither)
+        fps = args.fps
+        if _is_video(args.input):
+            w, h, video_fps = probe_video(args.input, args.ffprobe)
+            frames = iter_video_frames(args.input, (w, h), args.ffmpeg)
+            fps = fps or video_fps
+        elif os.path.isdir(args.input) or glob.has_magic(args.input):
+            frames = iter_image_sequence(args.input)
+        else:
+            raise ValueError(f"{args.input} is neither a video, a folder nor a glob pattern")
+        sink = VideoSink(args.output, fps or 24.0, args.ffmpeg) if _is_video(args.output) else FolderSink(args.output)
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    def report(stats):
+        if not args.quiet:
+            line = (f"{stats['frames']} frames  {stats['fps']:.1f} fps  queue {stats['queue']}/{stats['max_queue']}"
+                    f"  palettes {stats['palettes']}")
+            print(f"\r{line:<60}", end="", file=sys.stderr, flush=True)
+
+    engine = RenderEngine(args.jobs)
+    try:
+        stats = render_sequence(frames, sink, styles[0], args.pixel_size, dither, options, modes[0], engine,
+                                args.queue, args.scene_threshold, report)
+    except Exception as e:
+        print(("" if args.quiet else "\n") + f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.shutdown()
+    if not args.quiet:
+        print(f"\n{stats['frames']} frame(s) written to {args.output} in {stats['seconds']:.1f}s", file=sys.stderr)
+    return 0
+
+
+def _run_profiled(command, args) -> int:
+    # worker processes keep their own counters, so profiled runs render in this process
+    if hasattr(args, "jobs"):
+        args.jobs = 1
+    hook = None
+    if args.profile_log:
+        logging.basicConfig(stream=sys.stderr, format="%(message)s")
+        logging.getLogger("retro.profile").setLevel(logging.INFO)
+        hook = retro_profile.log_hook()
+        retro_profile.add_hook(hook)
+    retro_profile.enable(allocations=args.profile_alloc)
+    try:
+        return command(args)
+    finally:
+        retro_profile.disable()
+        if hook is not None:
+            retro_profile.remove_hook(hook)
+        if args.profile:
+            retro_profile.dump_json(sys.stderr if args.profile == "-" else args.profile)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.profile_alloc and not (args.profile or args.profile_log):
+        args.profile = "-"
+    if args.profile or args.profile_log:
+        command = {"convert": convert, "stream": stream, "sequence": sequence}[args.command]
+        return _run_profiled(command, args)
+    if args.command == "convert":
+        return convert(args)
+    if args.command == "stream":
+        return stream(args)
+    if args.command == "sequence":
+        return sequence(args)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
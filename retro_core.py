@@ -0,0 +1,1259 @@
+# Image pipeline for RetroImageMaker: palettes, console styles and cute modes.
+# Only depends on Pillow, so it can run without a display (see retro_cli.py).
+import os
+import re
+import math
+import struct
+import random
+import hashlib
+import threading
+from functools import lru_cache, wraps
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps, ImageDraw, ImageChops
+
+from retro_profile import profiled, stage as profile_stage
+
+PREVIEW_SIZE = (512, 512)
+GRID_THUMB_SIZE = (256, 256)
+MAX_PREVIEW_PROCESS_SIZE = 1600 
+# Progressive preview: coarse levels render first, the last one is the full preview resolution.
+PREVIEW_LEVELS = (256, 800, MAX_PREVIEW_PROCESS_SIZE)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+# Masks and dither maps only depend on size (and strength), so repeated renders at one size reuse them.
+# Each cache is bounded by bytes, not entries: one 48 MP mask weighs as much as thousands of preview ones.
+MASK_CACHE_BYTES = 96 * 1024 * 1024
+# Adaptive styles can pick their palette once per source from a copy this big (see sample_palette).
+PALETTE_SAMPLE_SIDE = 256
+
+# Built-in palettes
+PICO8_PALETTE = [
+    (0, 0, 0), (29, 43, 83), (126, 37, 83), (0, 135, 81),
+    (171, 82, 54), (95, 87, 79), (194, 195, 199), (255, 241, 232),
+    (255, 0, 77), (255, 163, 0), (255, 236, 39), (0, 228, 54),
+    (41, 173, 255), (131, 118, 156), (255, 119, 168), (255, 204, 170)
+]
+GAMEBOY_DMG_PALETTE = [
+    (15, 56, 15), (48, 98, 48), (139, 172, 15), (155, 188, 15)
+]
+C64_PALETTE = [
+    (0, 0, 0), (255, 255, 255), (136, 0, 0), (170, 255, 238),
+    (204, 68, 204), (0, 170, 0), (0, 0, 170), (238, 238, 119),
+    (221, 136, 85), (102, 68, 0), (255, 119, 119), (51, 51, 51),
+    (119, 119, 119), (170, 255, 102), (102, 136, 255), (187, 187, 187)
+]
+ZX_SPECTRUM_8 = [
+    (0, 0, 0), (0, 0, 192), (192, 0, 0), (192, 0, 192),
+    (0, 192, 0), (0, 192, 192), (192, 192, 0), (192, 192, 192)
+]
+EGA16_PALETTE = [
+    (0, 0, 0), (0, 0, 170), (0, 170, 0), (0, 170, 170),
+    (170, 0, 0), (170, 0, 170), (170, 85, 0), (170, 170, 170),
+    (85, 85, 85), (85, 85, 255), (85, 255, 85), (85, 255, 255),
+    (255, 85, 85), (255, 85, 255), (255, 255, 85), (255, 255, 255)
+]
+APPLE2_LORES_16 = [
+    (0, 0, 0), (147, 11, 124), (31, 53, 211), (187, 54, 255),
+    (0, 118, 12), (126, 126, 126), (7, 168, 224), (157, 172, 255),
+    (98, 76, 0), (249, 86, 29), (126, 126, 126), (255, 129, 236),
+    (67, 200, 0), (220, 205, 22), (93, 247, 132), (255, 255, 255)
+]
+NES_NESTOPIA_54 = [
+    (255,255,255),(173,173,173),(99,99,99),(0,0,0),(189,222,255),(99,173,255),(25,99,214),(0,41,140),
+    (214,214,255),(148,148,255),(66,66,255),(16,16,165),(247,197,255),(197,115,255),(115,41,255),(58,0,165),
+    (247,197,255),(239,107,255),(156,25,206),(90,0,123),(255,197,230),(255,107,206),(181,33,123),(107,0,66),
+    (255,206,197),(255,132,115),(181,49,33),(107,8,0),(247,214,165),(230,156,33),(156,74,0),(82,33,0),
+    (230,230,148),(189,189,0),(107,107,0),(49,49,0),(206,239,148),(140,214,0),(58,132,0),(8,74,0),
+    (189,247,173),(90,230,49),(16,148,0),(0,82,0),(181,247,206),(66,222,132),(0,140,49),(0,82,8),
+    (181,239,239),(74,206,222),(0,123,140),(0,66,74),(181,181,181),(82,82,82)
+]
+
+# Custom palette stuff
+CUSTOM_PALETTES = {
+    "My Palette": list(PICO8_PALETTE),
+}
+DEFAULT_CUSTOM_NAME = "My Palette"
+
+CUTE_MODES = [
+    "None",
+    "Pastel",
+    "Cute",
+    "CRT",
+    "Sticker Outline",
+    "Handheld Screen",
+    "Postcard Frame",
+    "Creepy",
+    "Yellowed Photo",
+    "Drawing",
+]
+
+
+def clamp8(v):
+    return max(0, min(255, int(v)))
+
+
+def parse_hex_color(s: str):
+    s = s.strip().lstrip('#')
+    if len(s) == 3:
+        s = ''.join(ch * 2 for ch in s)
+    if len(s) != 6:
+        raise ValueError("Hex must be either #RRGGBB or #RGB")
+    r, g, b = int(s[0:2], 16), int(s[2:4], 16), int(s[4:6], 16)
+    return (r, g, b)
+
+
+def to_hex(rgb):
+    r, g, b = rgb
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+# Palette files are read as a stream and parsing stops at MAX_PALETTE_COLORS, so a huge or odd file (a bulk
+# import meets plenty) costs at most PALETTE_FILE_LIMIT bytes; text lines and .ase blocks are read at most
+# PALETTE_RECORD_LIMIT bytes at a time.
+MAX_PALETTE_COLORS = 256
+PALETTE_FILE_LIMIT = 16 * 2 ** 20
+PALETTE_RECORD_LIMIT = 1024
+HEX6_RE = re.compile(r'[0-9A-Fa-f]{6}')
+
+
+def _open_palette(path: str, mode='r'):
+    if os.path.getsize(path) > PALETTE_FILE_LIMIT:
+        raise ValueError(f"Palette file is larger than {PALETTE_FILE_LIMIT // 2 ** 20} MB")
+    if mode == 'rb':
+        return open(path, 'rb')
+    return open(path, 'r', encoding='utf-8', errors='ignore')
+
+
+def _palette_lines(f):
+    """Stripped, non-empty lines of a text palette, read PALETTE_RECORD_LIMIT characters at a time.
+
+    A longer line is no palette record: it is read to its end and skipped, not split into several.
+    """
+    for line in iter(lambda: f.readline(PALETTE_RECORD_LIMIT), ''):
+        if len(line) == PALETTE_RECORD_LIMIT and not line.endswith('\n'):
+            rest = line
+            while rest and not rest.endswith('\n'):
+                rest = f.readline(PALETTE_RECORD_LIMIT)
+            continue
+        line = line.strip()
+        if line:
+            yield line
+
+
+def load_gpl(path: str):
+    """Load GIMP/Aseprite .gpl palette files."""
+    colors = []
+    with _open_palette(path) as f:
+        for line in _palette_lines(f):
+            if line.startswith('#') or line.lower().startswith(('gimp palette', 'name:', 'columns:')):
+                continue
+            parts = line.split()
+            if len(parts) >= 3:
+                try:
+                    r, g, b = [clamp8(int(parts[i])) for i in range(3)]
+                    colors.append((r, g, b))
+                except Exception:
+                    continue
+                if len(colors) == MAX_PALETTE_COLORS:
+                    break
+    if not colors:
+        raise ValueError("No colors found in .gpl provided")
+    return colors
+
+
+def save_gpl(path: str, palette, name="Custom"):
+    lines = []
+    lines.append("GIMP Palette\n")
+    lines.append(f"Name: {name}\n")
+    lines.append("Columns: 16\n")
+    lines.append("# Generated by RetroImageMaker\n")
+    for i, (r, g, b) in enumerate(palette):
+        lines.append(f"{r:3d} {g:3d} {b:3d}\tcolor{i + 1}\n")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+
+
+def load_jasc_pal(path: str):
+    colors = []
+    with _open_palette(path) as f:
+        lines = _palette_lines(f)
+        header = [next(lines, None) for _ in range(3)]
+        if header[0] != "JASC-PAL" or header[2] is None:
+            raise ValueError("Not a JASC-PAL file")
+        try:
+            n = int(header[2])
+        except Exception:
+            raise ValueError("Invalid color count in .pal")
+        for ln in lines:
+            if len(colors) >= min(n, MAX_PALETTE_COLORS):
+                break
+            parts = ln.split()
+            if len(parts) >= 3:
+                try:
+                    r, g, b = [clamp8(int(parts[i])) for i in range(3)]
+                except ValueError:
+                    raise ValueError("Invalid color line in .pal")
+                colors.append((r, g, b))
+    if not colors:
+        raise ValueError("No colors found in .pal")
+    return colors
+
+
+def save_jasc_pal(path: str, palette):
+    lines = ["JASC-PAL\n", "0100\n", f"{len(palette)}\n"]
+    for (r, g, b) in palette:
+        lines.append(f"{r} {g} {b}\n")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+
+
+def load_hex(path: str):
+    """Load a plain list of hex colors, one per line (Lospec's .hex); other lines are skipped.
+
+    A color is RRGGBB or #RRGGBB / #RGB at the start of a line, so words like "fade" or "bed" are not colors.
+    """
+    colors = []
+    with _open_palette(path) as f:
+        for line in _palette_lines(f):
+            token = line.split()[0]
+            if not (token.startswith('#') or HEX6_RE.fullmatch(token)):
+                continue
+            try:
+                colors.append(parse_hex_color(token))
+            except ValueError:
+                continue
+            if len(colors) == MAX_PALETTE_COLORS:
+                break
+    if not colors:
+        raise ValueError("No colors found in .hex")
+    return colors
+
+
+def load_act(path: str):
+    """Load an Adobe Color Table: 256 RGB triplets, optionally followed by a big-endian color count."""
+    with _open_palette(path, 'rb') as f:
+        data = f.read(772)
+    if len(data) < 3:
+        raise ValueError("No colors found in .act")
+    count = len(data) // 3
+    if len(data) == 772:
+        count = struct.unpack('>H', data[768:770])[0] or 256
+    count = min(count, 256, len(data) // 3)
+    return [tuple(data[i:i + 3]) for i in range(0, 3 * count, 3)]
+
+
+def _lab_to_rgb(l, a, b):
+    """CIE L*a*b* (D50, as Adobe stores it) to 8-bit sRGB."""
+    fy = (l + 16) / 116.0
+    fx, fz = fy + a / 500.0, fy - b / 200.0
+    xyz = [(t ** 3 if t ** 3 > 0.008856 else (t - 16 / 116.0) / 7.787) * w
+           for t, w in ((fx, 0.9642), (fy, 1.0), (fz, 0.8249))]
+    m = ((3.1339, -1.6169, -0.4906), (-0.9788, 1.9161, 0.0335), (0.0719, -0.2290, 1.4052))
+    rgb = []
+    for row in m:
+        v = sum(c * x for c, x in zip(row, xyz))
+        v = 12.92 * v if v <= 0.0031308 else 1.055 * max(v, 0.0) ** (1 / 2.4) - 0.055
+        rgb.append(clamp8(round(v * 255)))
+    return tuple(rgb)
+
+
+def load_ase(path: str):
+    """Load the RGB, gray, CMYK and Lab swatches of an Adobe Swatch Exchange file (groups are flattened)."""
+    colors = []
+    with _open_palette(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'ASEF':
+            raise ValueError("Not an Adobe Swatch Exchange file")
+        (blocks,) = struct.unpack('>I', header[8:12])
+        for _ in range(blocks):
+            head = f.read(6)
+            if len(head) < 6:
+                break
+            kind, length = struct.unpack('>HI', head)
+            body = f.read(min(length, PALETTE_RECORD_LIMIT))
+            if length > PALETTE_RECORD_LIMIT:
+                f.seek(length - PALETTE_RECORD_LIMIT, os.SEEK_CUR)
+            if kind != 0x0001 or len(body) < 2:
+                continue  # group start / end
+            name_bytes = 2 * struct.unpack('>H', body[:2])[0]
+            model, values = body[2 + name_bytes:6 + name_bytes], body[6 + name_bytes:]
+            channels = {b'RGB ': 3, b'CMYK': 4, b'LAB ': 3, b'Gray': 1}.get(model)
+            if channels is None or len(values) < 4 * channels:
+                continue
+            v = struct.unpack(f'>{channels}f', values[:4 * channels])
+            if model == b'RGB ':
+                rgb = tuple(clamp8(round(c * 255)) for c in v)
+            elif model == b'Gray':
+                rgb = (clamp8(round(v[0] * 255)),) * 3
+            elif model == b'CMYK':
+                rgb = tuple(clamp8(round(255 * (1 - c) * (1 - v[3]))) for c in v[:3])
+            else:
+                rgb = _lab_to_rgb(v[0] * 100, v[1], v[2])
+            colors.append(rgb)
+            if len(colors) == MAX_PALETTE_COLORS:
+                break
+    if not colors:
+        raise ValueError("No colors found in .ase")
+    return colors
+
+
+@profiled()
+def fit_image_for_preview(img: Image.Image, max_size=PREVIEW_SIZE, upscale=False) -> Image.Image:
+    """Shrink img into max_size; with upscale=True smaller images are blown up (NEAREST) to fill it."""
+    w, h = img.size
+    scale = min(max_size[0] / float(w), max_size[1] / float(h))
+    if upscale and scale > 1.0:
+        return img.resize((max(1, int(w * scale)), max(1, int(h * scale))), resample=Image.NEAREST)
+    img = img.copy()
+    img.thumbnail(max_size, resample=Image.LANCZOS)
+    return img
+
+
+@profiled()
+def downscale_for_preview_processing(img: Image.Image, max_side=MAX_PREVIEW_PROCESS_SIZE,
+                                     reducing_gap=None) -> Image.Image:
+    img = img.copy()
+    w, h = img.size
+    longest = max(w, h)
+    if longest <= max_side:
+        return img
+    scale = max_side / float(longest)
+    new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    return img.resize(new_size, resample=Image.LANCZOS, reducing_gap=reducing_gap)
+
+
+class SourceImage:
+    """An image file that is only decoded as far as each consumer needs.
+
+    Opening reads the header. at_most() gives the same size as downscale_for_preview_processing on the
+    full image; for JPEGs it decodes with draft() (DCT scaling, 1/2 .. 1/8) straight to the smallest scale
+    that is still at least that big. full() decodes at full resolution once, when a save needs it.
+    """
+
+    # preview levels share a scale (256 and 800 px both come from 1/8), so a couple of decodes cover them
+    DRAFT_CACHE_SIZE = 2
+    PALETTE_CACHE_SIZE = 32
+
+    def __init__(self, path: str):
+        with Image.open(path) as im:
+            self.size = im.size
+            self.format = im.format
+        st = os.stat(path)
+        self.path = path
+        # cache root key: the file's identity, so previews never need the full decode for hashing
+        self.key = hashlib.blake2b(repr((os.path.abspath(path), st.st_mtime_ns, st.st_size)).encode(),
+                                   digest_size=16).hexdigest()
+        self._full = None
+        self._drafts = OrderedDict()  # drafted size -> decode, the last DRAFT_CACHE_SIZE of them
+        self._palettes = OrderedDict()  # (style, option values) -> sample_palette
+        self._lock = threading.Lock()
+
+    def full(self) -> Image.Image:
+        with self._lock:
+            if self._full is None:
+                with Image.open(self.path) as im:
+                    self._full = im.convert('RGB')
+            return self._full
+
+    def palette(self, style: str, **options):
+        """sample_palette of this image, computed once per style and options, so every render of the image
+        (preview levels, compare grid, full-resolution save) maps onto the same colors."""
+        key = (style, palette_options_key(style, options))
+        with self._lock:
+            if key in self._palettes:
+                self._palettes.move_to_end(key)
+                return self._palettes[key]
+        pal = sample_palette(self.at_most(PALETTE_SAMPLE_SIDE, 3.0), style, self.size[0], **options)
+        with self._lock:
+            self._palettes[key] = pal
+            while len(self._palettes) > self.PALETTE_CACHE_SIZE:
+                self._palettes.popitem(last=False)
+        return pal
+
+    @profiled("load_preview")
+    def at_most(self, max_side=MAX_PREVIEW_PROCESS_SIZE, reducing_gap=None) -> Image.Image:
+        # JPEGs always take the draft path, so a level renders the same before and after a full decode
+        if self.format != "JPEG" or max(self.size) <= max_side:
+            return downscale_for_preview_processing(self.full(), max_side, reducing_gap)
+        w, h = self.size
+        scale = max_side / float(max(w, h))
+        new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        with Image.open(self.path) as im:
+            im.draft('RGB', new_size)
+            with self._lock:
+                img = self._drafts.get(im.size)
+            if img is None:
+                img = im.convert('RGB')
+                with self._lock:
+                    self._drafts[img.size] = img
+                    while len(self._drafts) > self.DRAFT_CACHE_SIZE:
+                        self._drafts.popitem(last=False)
+        if img.size == new_size:
+            return img
+        return img.resize(new_size, resample=Image.LANCZOS, reducing_gap=reducing_gap)
+
+
+def scaled_pixel_size(pixel_size: int, level_side: int, reference_side: int) -> int:
+    """Pixel size giving the same number of blocks at level_side as pixel_size gives at reference_side."""
+    return max(1, int(round(int(pixel_size) * level_side / float(max(1, reference_side)))))
+
+
+def build_palette_image(palette_colors):
+    pal_img = Image.new('P', (1, 1))
+    flat = []
+    for (r, g, b) in palette_colors:
+        flat += [int(r), int(g), int(b)]
+    if len(palette_colors) < 256:
+        flat += [0, 0, 0] * (256 - len(palette_colors))
+    pal_img.putpalette(flat)
+    return pal_img
+
+
+# ---- palette index ----
+# Pillow maps RGB onto a palette through a 64x64x64 nearest-color cube (one cell per 4x4x4 colors) that
+# lives on the palette image and fills lazily. PaletteIndex keeps one palette image per palette so the
+# cube is built once and each later pixel is a single table lookup.
+
+
+def palette_digest(palette_colors) -> str:
+    """Content hash of a palette (the same colors in the same order hash alike, whatever their name)."""
+    return hashlib.sha1(repr(tuple((int(r), int(g), int(b)) for (r, g, b) in palette_colors)).encode()).hexdigest()
+
+
+class PaletteIndex:
+    def __init__(self, palette_colors):
+        self.colors = tuple((int(r), int(g), int(b)) for (r, g, b) in palette_colors)
+        self.image = build_palette_image(self.colors)
+        self._spread = None
+        # Pillow fills the cube in place while the GIL is released
+        self._lock = threading.Lock()
+
+    def quantize(self, img: Image.Image, dither: bool) -> Image.Image:
+        dither_flag = Image.FLOYDSTEINBERG if dither else Image.NONE
+        rgb = img.convert('RGB')
+        with self._lock:
+            quant = rgb.quantize(palette=self.image, dither=dither_flag)
+        return quant.convert('RGB')
+
+    @property
+    def spread(self) -> float:
+        """ordered_spread of the palette, for the Bayer dithers."""
+        if self._spread is None:
+            self._spread = ordered_spread(self.colors)
+        return self._spread
+
+
+@lru_cache(maxsize=64)
+def _palette_index(colors) -> PaletteIndex:
+    return PaletteIndex(colors)
+
+
+def palette_index(palette_colors) -> PaletteIndex:
+    """Shared PaletteIndex for a palette (built-in, NES emphasis variant or user palette)."""
+    return _palette_index(tuple(tuple(int(v) for v in c) for c in palette_colors))
+
+
+# adaptive palettes change with every image (or scene), so they get their own small cache instead of
+# evicting the fixed palettes above; a palette reused across previews, frames or saves still hits it
+@lru_cache(maxsize=8)
+def _adaptive_palette_index(colors) -> PaletteIndex:
+    return PaletteIndex(colors)
+
+
+def adaptive_palette_index(palette_colors) -> PaletteIndex:
+    """PaletteIndex for a palette picked from an image (median cut or histogram), kept apart from palette_index."""
+    return _adaptive_palette_index(tuple(tuple(int(v) for v in c) for c in palette_colors))
+
+
+# ---- dithering ----
+# Floyd-Steinberg is Pillow's serial error diffusion. The Bayer modes add a fixed threshold per pixel-grid cell
+# before plain nearest-color mapping, so any tile or strip renders exactly as it would inside the whole image.
+DITHER_MODES = ["None", "Floyd-Steinberg", "Bayer 2x2", "Bayer 4x4", "Bayer 8x8"]
+BAYER_SIZES = {"Bayer 2x2": 2, "Bayer 4x4": 4, "Bayer 8x8": 8}
+
+
+def dither_mode(dither) -> str:
+    """Normalize a dither argument: True/False (the original checkbox) or one of DITHER_MODES."""
+    if isinstance(dither, str):
+        if dither not in DITHER_MODES:
+            raise ValueError(f"Unknown dither mode '{dither}'")
+        return dither
+    return "Floyd-Steinberg" if dither else "None"
+
+
+@lru_cache(maxsize=None)
+def bayer_matrix(n: int) -> np.ndarray:
+    """n x n Bayer index matrix (n a power of two) holding 0 .. n*n - 1."""
+    m = np.zeros((1, 1), dtype=np.uint8)
+    while m.shape[0] < n:
+        m = np.block([[4 * m, 4 * m + 2], [4 * m + 3, 4 * m + 1]]).astype(np.uint8)
+    return m
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return value.width * value.height * len(value.getbands())
+
+
+def byte_bounded_cache(max_bytes=MASK_CACHE_BYTES):
+    """Like lru_cache, but evicts least recently used results once their total size passes max_bytes.
+
+    Results are numpy arrays or images; one bigger than max_bytes is returned without being kept.
+    """
+    def decorator(fn):
+        entries = OrderedDict()
+        lock = threading.Lock()
+        total = 0
+
+        @wraps(fn)
+        def cached(*args, **kwargs):
+            nonlocal total
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                if key in entries:
+                    entries.move_to_end(key)
+                    return entries[key]
+            value = fn(*args, **kwargs)
+            size = _nbytes(value)
+            if size <= max_bytes:
+                with lock:
+                    if key not in entries:
+                        entries[key] = value
+                        total += size
+                        while total > max_bytes:
+                            _, evicted = entries.popitem(last=False)
+                            total -= _nbytes(evicted)
+            return value
+
+        def cache_clear():
+            nonlocal total
+            with lock:
+                entries.clear()
+                total = 0
+
+        cached.cache_clear = cache_clear
+        cached.cache_bytes = lambda: total
+        return cached
+    return decorator
+
+
+@byte_bounded_cache()
+def bayer_index_map(size, n: int, cell=1, origin=(0, 0)) -> np.ndarray:
+    """Bayer index for every pixel of an image of size, one matrix entry per cell x cell block.
+
+    Blocks follow pixelate's NEAREST upscale, so each block of a pixelated image gets a single threshold.
+    origin is the (column, row) of the first grid cell, for tiles and strips cut out of a larger image.
+    """
+    w, h = size
+    grid_w, grid_h = (max(1, w // cell), max(1, h // cell)) if cell > 1 else (w, h)
+    rows = (np.arange(grid_h) + origin[1]) % n
+    cols = (np.arange(grid_w) + origin[0]) % n
+    grid = bayer_matrix(n)[rows[:, None], cols[None, :]]
+    if (grid_w, grid_h) != (w, h):
+        grid = np.asarray(Image.fromarray(grid, 'L').resize((w, h), resample=Image.NEAREST))
+    grid.setflags(write=False)
+    return grid
+
+
+def ordered_spread(palette_colors) -> float:
+    """Threshold amplitude for a palette: mean distance (largest channel step) to the nearest other color."""
+    pal = np.array(palette_colors, dtype=np.int32).reshape(-1, 3)
+    if len(pal) < 2:
+        return 0.0
+    dist = np.abs(pal[:, None, :] - pal[None, :, :]).max(axis=-1).astype(np.float64)
+    np.fill_diagonal(dist, np.inf)
+    return float(dist.min(axis=1).mean())
+
+
+@profiled()
+def ordered_dither(img: Image.Image, n: int, spread: float, cell=1, origin=(0, 0)) -> Image.Image:
+    """Offset img by an n x n Bayer threshold of +-spread/2 per channel, ready for nearest-color mapping."""
+    offsets = np.round(((np.arange(n * n) + 0.5) / (n * n) - 0.5) * spread).astype(np.int16)
+    rgb = np.asarray(img.convert('RGB'), dtype=np.int16)
+    rgb = rgb + offsets[bayer_index_map(img.size, n, cell, tuple(origin))][:, :, None]
+    return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8), 'RGB')
+
+
+@profiled()
+def quantize_to_palette(img: Image.Image, palette_colors, dither, cell=1, origin=(0, 0)) -> Image.Image:
+    """Map img onto a palette (a list of RGB colors or a PaletteIndex)."""
+    mode = dither_mode(dither)
+    index = palette_colors if isinstance(palette_colors, PaletteIndex) else palette_index(palette_colors)
+    if mode in BAYER_SIZES:
+        img = ordered_dither(img, BAYER_SIZES[mode], index.spread, cell, origin)
+    return index.quantize(img, mode == "Floyd-Steinberg")
+
+
+# ---- histogram palettes ----
+# After a bit-depth snap an image holds at most 2**(3*bits) colors (32768 for RGB555, 512 for RGB333), so one
+# counting pass into a flat array describes it completely and the median cut only visits the distinct colors.
+
+def color_histogram(img: Image.Image, bits: int) -> np.ndarray:
+    """Pixel count of every cell of the bits-per-channel color cube, indexed r << 2*bits | g << bits | b."""
+    shift = 8 - bits
+    r, g, b = (np.asarray(ch) for ch in img.convert('RGB').point([v >> shift for v in range(256)] * 3).split())
+    codes = (r.astype(np.uint32) << (2 * bits)) | (g.astype(np.uint32) << bits) | b
+    return np.bincount(codes.ravel(), minlength=1 << (3 * bits))
+
+
+def channel_levels(img: Image.Image, bits: int) -> np.ndarray:
+    """(3, 2**bits) value standing for each level of each channel: the mean of the img values inside it.
+
+    A snapped image (and the Genesis curve on top) has one value per level, so this is exact.
+    """
+    hist = np.asarray(img.convert('RGB').histogram(), dtype=np.float64).reshape(3, 1 << bits, 256 >> bits)
+    values = np.arange(256, dtype=np.float64).reshape(1 << bits, -1)
+    totals = hist.sum(axis=-1)
+    return np.where(totals > 0, (hist * values).sum(axis=-1) / np.maximum(totals, 1), values.mean(axis=-1))
+
+
+def _box_error(colors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Weighted squared error per channel of a box around its mean."""
+    mean = weights @ colors / weights.sum()
+    return weights @ (colors - mean) ** 2
+
+
+def median_cut(colors: np.ndarray, weights: np.ndarray, n: int):
+    """Weighted median cut of (k, 3) colors into at most n boxes; returns the box means as RGB tuples.
+
+    The box with the largest squared error is split at the weighted median of its widest channel.
+    """
+    boxes = [(np.arange(len(colors)), float(_box_error(colors, weights).sum()))]
+    while len(boxes) < n:
+        i = max(range(len(boxes)), key=lambda k: boxes[k][1])
+        members, error = boxes[i]
+        if len(members) < 2 or error <= 0:
+            break
+        boxes.pop(i)
+        box = colors[members]
+        channel = int(np.argmax(_box_error(box, weights[members])))
+        members = members[np.argsort(box[:, channel], kind='stable')]
+        cumulative = np.cumsum(weights[members])
+        split = min(int(np.searchsorted(cumulative, cumulative[-1] / 2.0)), len(members) - 2) + 1
+        for part in (members[:split], members[split:]):
+            boxes.append((part, float(_box_error(colors[part], weights[part]).sum()) if len(part) > 1 else 0.0))
+    return [tuple(int(v) for v in np.round(weights[m] @ colors[m] / weights[m].sum())) for m, _ in boxes]
+
+
+@profiled()
+def histogram_palette(img: Image.Image, colors: int, bits: int):
+    """Median-cut palette of at most colors entries from img's color_histogram at bits per channel.
+
+    Counting is one pass over the pixels; the cut itself costs per distinct color, not per pixel.
+    """
+    counts = color_histogram(img, bits)
+    codes = np.flatnonzero(counts)
+    levels = channel_levels(img, bits)
+    mask = (1 << bits) - 1
+    cube = np.stack([levels[0][codes >> (2 * bits)], levels[1][(codes >> bits) & mask], levels[2][codes & mask]],
+                    axis=-1)
+    return median_cut(cube, counts[codes].astype(np.float64), colors)
+
+
+@profiled()
+def quantize_adaptive(img: Image.Image, colors: int, dither, cell=1, origin=(0, 0), palette=None,
+                      bits=None) -> Image.Image:
+    """Median-cut palette of at most colors entries; Bayer modes map onto the palette of the undithered image.
+
+    A given palette (e.g. one shared by every frame of an animation) replaces the median cut. With bits (the
+    style's snap depth) the palette comes from histogram_palette instead of Pillow's per-pixel median cut.
+    """
+    if palette is None and bits is not None:
+        palette = histogram_palette(img, colors, bits)
+    if palette is not None:
+        if not isinstance(palette, PaletteIndex):
+            palette = adaptive_palette_index(palette)
+        return quantize_to_palette(img, palette, dither, cell, origin)
+    mode = dither_mode(dither)
+    img = img.convert('RGB')
+    if mode in BAYER_SIZES:
+        pal = img.quantize(colors=colors, method=0, dither=Image.NONE)
+        used = pal.getpalette()[:3 * len(pal.getcolors(256))]
+        img = ordered_dither(img, BAYER_SIZES[mode], ordered_spread(np.reshape(used, (-1, 3))), cell, origin)
+        return img.quantize(palette=pal, dither=Image.NONE).convert('RGB')
+    dither_flag = Image.FLOYDSTEINBERG if mode == "Floyd-Steinberg" else Image.NONE
+    return img.quantize(colors=colors, method=0, dither=dither_flag).convert('RGB')
+
+
+def pixel_grid(img: Image.Image, pixel_size: int) -> Image.Image:
+    """Downscale img so each output block of pixel_size x pixel_size becomes one pixel."""
+    w, h = img.size
+    pixel_size = max(1, int(pixel_size))
+    small_w = max(1, w // pixel_size)
+    small_h = max(1, h // pixel_size)
+    return img.resize((small_w, small_h), resample=Image.BILINEAR)
+
+
+def pixelate(img: Image.Image, pixel_size: int) -> Image.Image:
+    small = pixel_grid(img, pixel_size)
+    result = small.resize(img.size, resample=Image.NEAREST)
+    return result
+
+
+def enhance_arcade(img: Image.Image) -> Image.Image:
+    img = ImageEnhance.Contrast(img).enhance(1.2)
+    img = ImageEnhance.Color(img).enhance(1.1)
+    return img
+
+
+def _snap_table(bits: int):
+    levels = (1 << bits) - 1
+    return [int(round((v / 255.0) * levels)) * (255 // levels) for v in range(256)]
+
+
+# 768-entry (R, G, B) tables for Image.point, built once at import
+SNAP_LUTS = {bits: _snap_table(bits) * 3 for bits in (3, 5, 6)}
+
+
+def snap_rgb_bits(img: Image.Image, bits: int) -> Image.Image:
+    lut = SNAP_LUTS.get(bits) or _snap_table(bits) * 3
+    return (img if img.mode == 'RGB' else img.convert('RGB')).point(lut)
+
+
+def snap_rgb333(img: Image.Image) -> Image.Image:
+    return snap_rgb_bits(img, 3)
+
+
+def snap_rgb555(img: Image.Image) -> Image.Image:
+    return snap_rgb_bits(img, 5)
+
+
+def snap_rgb666(img: Image.Image) -> Image.Image:
+    return snap_rgb_bits(img, 6)
+
+
+def apply_nes_emphasis(palette, emphasize_r=False, emphasize_g=False, emphasize_b=False):
+    r_factor = 1.0 if emphasize_r else 0.85
+    g_factor = 1.0 if emphasize_g else 0.85
+    b_factor = 1.0 if emphasize_b else 0.85
+    out = []
+    for (r, g, b) in palette:
+        rr = max(0, min(255, int(r * r_factor)))
+        gg = max(0, min(255, int(g * g_factor)))
+        bb = max(0, min(255, int(b * b_factor)))
+        out.append((rr, gg, bb))
+    return out
+
+
+# ---- Genesis non-linear VDP curve ----
+GENESIS_LEVELS = [0, 52, 87, 116, 144, 172, 206, 255]
+GENESIS_VDP_LUT = [min(GENESIS_LEVELS, key=lambda x: abs(x - v)) for v in range(256)] * 3
+
+
+def apply_genesis_vdp_curve(img: Image.Image) -> Image.Image:
+    return (img if img.mode == 'RGB' else img.convert('RGB')).point(GENESIS_VDP_LUT)
+
+
+# ---- style registry ----
+# Every console style is one declarative ConsoleStyle: prepare -> blur (if first) -> bit-depth snap -> level
+# curve -> blur -> fixed palette or adaptive median cut. Options (NES emphasis, N64 mode, ...) select a
+# variant of the entry; variants are built once and keep their own palette index and blur filter.
+VARIANT_CACHE_SIZE = 16
+
+
+@lru_cache(maxsize=32)
+def gaussian_blur(radius: float) -> ImageFilter.GaussianBlur:
+    return ImageFilter.GaussianBlur(radius=radius)
+
+
+class ConsoleStyle:
+    """A console style: which steps of the pipeline run, with what palette, bit depth, blur and color count.
+
+    palette is a fixed palette, colors the median-cut size of adaptive styles (neither: full color).
+    options names the apply_style keyword options the style reads; variant(style, **those) returns the
+    ConsoleStyle to use for them.
+    """
+
+    def __init__(self, name, key, palette=None, colors=None, bits=None, curve=None, blur=None, blur_first=False,
+                 prepare=None, options=(), variant=None):
+        self.name = name
+        self.key = key
+        self.palette = None if palette is None else tuple(tuple(int(v) for v in c) for c in palette)
+        self.colors = colors
+        self.bits = bits
+        self.curve = curve
+        self.blur = blur
+        self.blur_first = blur_first
+        self.prepare = prepare
+        self.options = tuple(options)
+        self.variant = variant
+        self._index = None
+        self._variants = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def adaptive(self) -> bool:
+        return self.palette is None and self.colors is not None
+
+    @property
+    def per_pixel(self) -> bool:
+        """True when every output pixel depends only on its own input pixel (no blur, no image-wide palette)."""
+        return self.blur is None and not self.adaptive
+
+    @property
+    def index(self) -> PaletteIndex:
+        """Shared PaletteIndex of the fixed palette, looked up once per style variant."""
+        if self._index is None:
+            self._index = palette_index(self.palette)
+        return self._index
+
+    def replace(self, **changes) -> "ConsoleStyle":
+        fields = dict(name=self.name, key=self.key, palette=self.palette, colors=self.colors, bits=self.bits,
+                      curve=self.curve, blur=self.blur, blur_first=self.blur_first, prepare=self.prepare)
+        fields.update(changes)
+        return ConsoleStyle(**fields)
+
+    def resolve(self, **options) -> "ConsoleStyle":
+        """The compiled style for these options (unrelated options are ignored)."""
+        if self.variant is None:
+            return self
+        values = tuple(_freeze(options.get(name)) for name in self.options)
+        with self._lock:
+            compiled = self._variants.get(values)
+            if compiled is not None:
+                self._variants.move_to_end(values)
+                return compiled
+        compiled = self.variant(self, **dict(zip(self.options, values)))
+        with self._lock:
+            self._variants[values] = compiled
+            while len(self._variants) > VARIANT_CACHE_SIZE:
+                self._variants.popitem(last=False)
+        return compiled
+
+    def _blur(self, work: Image.Image, blur_scale: float) -> Image.Image:
+        with profile_stage("blur"):
+            return work.filter(gaussian_blur(self.blur * blur_scale))
+
+    def reduce(self, work: Image.Image, dither, blur_scale=1.0, cell=1, origin=(0, 0), adaptive_palette=None):
+        """Run the color pipeline on a pixelate_stage output (see reduce_colors)."""
+        work = self.prepare_colors(work, blur_scale)
+        if self.palette is not None:
+            return quantize_to_palette(work, self.index, dither, cell, origin)
+        if self.colors is not None:
+            return quantize_adaptive(work, self.colors, dither, cell, origin, adaptive_palette, self.bits)
+        return work
+
+    def prepare_colors(self, work: Image.Image, blur_scale=1.0) -> Image.Image:
+        """Every step before the palette: prepare, blur, bit-depth snap and level curve."""
+        if self.prepare is not None:
+            work = self.prepare(work)
+        if self.blur is not None and self.blur_first:
+            work = self._blur(work, blur_scale)
+        if self.bits is not None:
+            work = snap_rgb_bits(work, self.bits)
+        if self.curve is not None:
+            work = self.curve(work)
+        if self.blur is not None and not self.blur_first:
+            work = self._blur(work, blur_scale)
+        return work
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _brighten_gameboy(img: Image.Image) -> Image.Image:
+    return ImageEnhance.Brightness(img).enhance(1.05)
+
+
+def _ps1_variant(style, ps1_movie=False):
+    # Movie mode: 24-bit output, no palette limit, stronger blur
+    return style.replace(blur=1.2, colors=None) if ps1_movie else style.replace()
+
+
+def _genesis_variant(style, genesis_vdp=False):
+    return style.replace(curve=apply_genesis_vdp_curve if genesis_vdp else None)
+
+
+def _nes_variant(style, nes_r=False, nes_g=False, nes_b=False):
+    return style.replace(palette=apply_nes_emphasis(NES_NESTOPIA_54, nes_r, nes_g, nes_b))
+
+
+def _n64_variant(style, n64_mode="RGBA5551"):
+    return style.replace(colors={"CI8": 256, "CI4": 16}.get(n64_mode, 64))
+
+
+def _custom_variant(style, custom_palette=None):
+    pal = custom_palette if custom_palette else CUSTOM_PALETTES.get(DEFAULT_CUSTOM_NAME, [])
+    if not pal:
+        raise ValueError("Custom palette is empty. Edit or import a palette.")
+    return style.replace(palette=pal)
+
+
+STYLE_REGISTRY = {}  # name -> ConsoleStyle, in menu order
+_STYLE_KEYS = {}  # short key -> ConsoleStyle
+
+
+def register_style(style: ConsoleStyle) -> ConsoleStyle:
+    """Add a style to STYLE_REGISTRY (and the menus built from STYLES); returns it."""
+    if style.name in STYLE_REGISTRY or style.key in _STYLE_KEYS:
+        raise ValueError(f"Style '{style.name}' ({style.key}) is already registered")
+    STYLE_REGISTRY[style.name] = _STYLE_KEYS[style.key] = style
+    STYLES.append(style.name)
+    if style.adaptive:
+        ADAPTIVE_STYLES.append(style.name)
+    return style
+
+
+def get_style(name: str) -> ConsoleStyle:
+    """Registered style by display name or short key."""
+    style = STYLE_REGISTRY.get(name) or _STYLE_KEYS.get(name)
+    if style is None:
+        raise ValueError(f"Unknown style '{name}'")
+    return style
+
+
+def sample_palette(img: Image.Image, style: str, full_width=None, **options):
+    """Median-cut palette an adaptive style picks for img, from a PALETTE_SAMPLE_SIDE copy; None if the style
+    (with these options) has a fixed palette or none. Pass it as adaptive_palette to reuse it.
+
+    full_width is the width of the original when img is already a reduced copy (blurs scale with it).
+    """
+    spec = get_style(style).resolve(**options)
+    if not spec.adaptive:
+        return None
+    sample = downscale_for_preview_processing(img, PALETTE_SAMPLE_SIDE, 3.0).convert('RGB')
+    work = spec.prepare_colors(sample, sample.width / float(max(1, full_width or img.width)))
+    if spec.bits is not None:
+        return histogram_palette(work, spec.colors, spec.bits)
+    quant = work.quantize(colors=spec.colors, method=0, dither=Image.NONE)
+    used = quant.getpalette()[:3 * len(quant.getcolors(256))]
+    return [tuple(used[i:i + 3]) for i in range(0, len(used), 3)]
+
+
+def palette_options_key(style: str, options) -> tuple:
+    """The values of the options style reads, hashable (for caching per-style results)."""
+    return tuple(_freeze((options or {}).get(name)) for name in get_style(style).options)
+
+
+STYLES = []
+# styles that pick their colors per image (median cut) rather than from a fixed palette
+ADAPTIVE_STYLES = []
+
+for _style in (
+    ConsoleStyle("PICO-8 (16 colors)", "pico8", palette=PICO8_PALETTE),
+    ConsoleStyle("Game Boy (4 colors)", "dmg", palette=GAMEBOY_DMG_PALETTE, prepare=_brighten_gameboy),
+    ConsoleStyle("Commodore 64 (16 colors)", "c64", palette=C64_PALETTE),
+    ConsoleStyle("ZX Spectrum (8 colors)", "zx", palette=ZX_SPECTRUM_8),
+    ConsoleStyle("EGA 16", "ega", palette=EGA16_PALETTE),
+    ConsoleStyle("Apple II (Lo-Res 16)", "apple2", palette=APPLE2_LORES_16),
+    ConsoleStyle("Game Boy Color (RGB555, 32 colors)", "gbc", colors=32, bits=5),
+    ConsoleStyle("Game Boy Advance (RGB555, 64 colors)", "gba", colors=64, bits=5),
+    ConsoleStyle("Nintendo DS (RGB666, 64 colors)", "nds", colors=64, bits=6),
+    ConsoleStyle("PlayStation (PS1, RGB555, 32 colors)", "ps1", colors=32, bits=5, blur=0.5,
+                 options=("ps1_movie",), variant=_ps1_variant),
+    ConsoleStyle("Sega Genesis / Mega Drive (RGB333, 64 colors)", "genesis", colors=64, bits=3,
+                 options=("genesis_vdp",), variant=_genesis_variant),
+    ConsoleStyle("NES (Nestopia 54-color)", "nes", palette=NES_NESTOPIA_54,
+                 options=("nes_r", "nes_g", "nes_b"), variant=_nes_variant),
+    ConsoleStyle("Nintendo 64 (RGBA5551-like, 64 colors)", "n64", colors=64, bits=5, blur=0.6, blur_first=True,
+                 options=("n64_mode",), variant=_n64_variant),
+    ConsoleStyle("Adaptive 32-color (Arcade-like)", "arcade32", colors=32, prepare=enhance_arcade),
+    ConsoleStyle("Custom Palette (User)", "custom", palette=(),
+                 options=("custom_palette",), variant=_custom_variant),
+):
+    register_style(_style)
+
+
+@profiled()
+def apply_style(img: Image.Image, style: str, pixel_size: int, dither,
+                nes_r=False, nes_g=False, nes_b=False,
+                genesis_vdp=False, ps1_movie=False,
+                n64_mode="RGBA5551", custom_palette=None, grid_space=False, adaptive_palette=None) -> Image.Image:
+    """Render img in a console style.
+
+    With grid_space=True all palette and bit-depth work runs on the pixel grid (one pixel per block)
+    and the result is upscaled once at the end. Point operations and fixed-palette quantization
+    without dithering give byte-identical output. Adaptive palettes and the Arcade contrast match
+    exactly when the image size is a multiple of pixel_size; otherwise the partial edge blocks carry
+    slightly different weight. Floyd-Steinberg diffuses error between blocks instead of inside them, so
+    every block stays a single color. The Bayer dithers already use one threshold per block and match
+    exactly. The PS1/N64 blurs keep their place in the chain and their radius is divided by pixel_size,
+    i.e. the same softening measured in grid pixels.
+    """
+    work = pixelate_stage(img, pixel_size, grid_space)
+    return reduce_colors(work, style, dither, nes_r=nes_r, nes_g=nes_g, nes_b=nes_b,
+                         genesis_vdp=genesis_vdp, ps1_movie=ps1_movie, n64_mode=n64_mode,
+                         custom_palette=custom_palette, grid_space=grid_space,
+                         pixel_size=pixel_size, out_size=img.size, adaptive_palette=adaptive_palette)
+
+
+@profiled("pixelate")
+def pixelate_stage(img: Image.Image, pixel_size: int, grid_space=False) -> Image.Image:
+    """First stage of apply_style: the blocky image, or just its pixel grid in grid-space mode."""
+    return pixel_grid(img, pixel_size) if grid_space else pixelate(img, pixel_size)
+
+
+@profiled()
+def reduce_colors(work: Image.Image, style: str, dither,
+                  nes_r=False, nes_g=False, nes_b=False,
+                  genesis_vdp=False, ps1_movie=False,
+                  n64_mode="RGBA5551", custom_palette=None, grid_space=False,
+                  pixel_size=1, out_size=None, dither_origin=(0, 0), adaptive_palette=None) -> Image.Image:
+    """Second stage of apply_style: palette / bit-depth reduction of the pixelate_stage output.
+
+    In grid-space mode pixel_size scales the blurs and the result is upscaled to out_size.
+    dither is a bool or one of DITHER_MODES; dither_origin is the grid cell work starts at (for strips).
+    adaptive_palette, if given, is used by the ADAPTIVE_STYLES instead of their own median cut.
+    """
+    blur_scale = 1.0 / max(1, int(pixel_size)) if grid_space else 1.0
+    # ordered dithers use one threshold per block of the pixelated image
+    cell = 1 if grid_space else max(1, int(pixel_size))
+    spec = get_style(style).resolve(nes_r=nes_r, nes_g=nes_g, nes_b=nes_b, genesis_vdp=genesis_vdp,
+                                    ps1_movie=ps1_movie, n64_mode=n64_mode, custom_palette=custom_palette)
+    work = spec.reduce(work, dither, blur_scale, cell, dither_origin, adaptive_palette)
+    if grid_space and out_size is not None:
+        work = work.resize(out_size, resample=Image.NEAREST)
+    return work
+
+
+#custom mode helpers
+
+def _soft_light_blend(base: Image.Image, overlay: Image.Image, alpha=0.35) -> Image.Image:
+    return Image.blend(base.convert('RGB'), overlay.convert('RGB'), max(0.0, min(1.0, alpha)))
+
+
+@byte_bounded_cache()
+def vignette_mask(size, strength=0.35) -> Image.Image:
+    w, h = size
+    cx, cy = w / 2.0, h / 2.0
+    max_dist = math.sqrt(cx * cx + cy * cy)
+    dx2 = (np.arange(w, dtype=np.float64) - cx) ** 2
+    dy2 = (np.arange(h, dtype=np.float64) - cy) ** 2
+    d = np.sqrt(dy2[:, None] + dx2[None, :]) / max_dist
+    v = (255 * (1.0 - strength * d ** 1.8)).astype(np.int64)
+    return Image.fromarray(np.clip(v, 0, 255).astype(np.uint8), 'L')
+
+
+@byte_bounded_cache()
+def scanline_mask(size, dark=230) -> Image.Image:
+    w, h = size
+    rows = np.full((h, w), 255, dtype=np.uint8)
+    rows[0::2] = dark
+    return Image.fromarray(rows, 'L')
+
+
+def _add_vignette(img: Image.Image, strength=0.35):
+    img = img.convert('RGB')
+    mask = vignette_mask(img.size, strength)
+    return ImageChops.multiply(img, Image.merge('RGB', (mask, mask, mask)))
+
+
+def cute_pastel(img: Image.Image) -> Image.Image:
+    img = img.convert('RGB')
+    img = ImageEnhance.Color(img).enhance(0.78)
+    img = ImageEnhance.Contrast(img).enhance(0.92)
+    img = ImageEnhance.Brightness(img).enhance(1.08)
+    overlay = Image.new('RGB', img.size, (255, 225, 240))
+    overlay2 = Image.new('RGB', img.size, (215, 235, 255))
+    blended = _soft_light_blend(img, overlay, 0.22)
+    blended = _soft_light_blend(blended, overlay2, 0.12)
+    return blended
+
+
+def cute_kawaii(img: Image.Image) -> Image.Image:
+    img = cute_pastel(img)
+    img = ImageEnhance.Brightness(img).enhance(1.06)
+    img = ImageEnhance.Sharpness(img).enhance(1.15)
+    base = img.convert('RGBA')
+    overlay = Image.new('RGBA', base.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    w, h = base.size
+    seed = (w * 73856093) ^ (h * 19349663)
+    rnd = random.Random(seed)
+    sparkle_count = max(8, min(36, (w * h) // 45000))
+    for _ in range(sparkle_count):
+        x = rnd.randint(10, max(11, w - 11))
+        y = rnd.randint(10, max(11, h - 11))
+        s = rnd.randint(3, 8)
+        color = rnd.choice([
+            (255, 255, 255, 150),
+            (255, 220, 240, 140),
+            (220, 240, 255, 140),
+            (255, 245, 180, 130),
+        ])
+        draw.line((x - s, y, x + s, y), fill=color, width=1)
+        draw.line((x, y - s, x, y + s), fill=color, width=1)
+    return Image.alpha_composite(base, overlay).convert('RGB')
+
+
+def cute_crt(img: Image.Image) -> Image.Image:
+    base = img.convert('RGB')
+    base = ImageEnhance.Color(base).enhance(1.1)
+    base = ImageEnhance.Contrast(base).enhance(1.08)
+    r, g, b = base.split()
+    r = ImageChops.offset(r, 1, 0)
+    b = ImageChops.offset(b, -1, 0)
+    chroma = Image.merge('RGB', (r, g, b)).filter(ImageFilter.GaussianBlur(radius=0.5))
+    scan = scanline_mask(chroma.size)
+    chroma = ImageChops.multiply(chroma, Image.merge('RGB', (scan, scan, scan)))
+    chroma = _add_vignette(chroma, 0.22)
+    return chroma
+
+
+def cute_sticker_outline(img: Image.Image) -> Image.Image:
+    base = img.convert('RGBA')
+    w, h = base.size
+    pad = max(18, min(80, int(min(w, h) * 0.07)))
+    shadow_pad = pad + 8
+    canvas = Image.new('RGBA', (w + shadow_pad * 2, h + shadow_pad * 2), (0, 0, 0, 0))
+    shadow = Image.new('RGBA', canvas.size, (0, 0, 0, 0))
+    sd = ImageDraw.Draw(shadow)
+    shadow_box = (shadow_pad + 6, shadow_pad + 8, shadow_pad + 6 + w + pad * 2, shadow_pad + 8 + h + pad * 2)
+    sd.rounded_rectangle(shadow_box, radius=max(16, pad), fill=(0, 0, 0, 90))
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=10))
+    canvas = Image.alpha_composite(canvas, shadow)
+    draw = ImageDraw.Draw(canvas)
+    box = (shadow_pad, shadow_pad, shadow_pad + w + pad * 2, shadow_pad + h + pad * 2)
+    draw.rounded_rectangle(box, radius=max(16, pad), fill=(255, 255, 255, 255))
+    inner_box = (shadow_pad + pad, shadow_pad + pad, shadow_pad + pad + w, shadow_pad + pad + h)
+    rounded = Image.new('RGBA', (w, h), (0, 0, 0, 0))
+    rounded.paste(base, (0, 0))
+    canvas.paste(rounded, (inner_box[0], inner_box[1]), rounded)
+    return canvas
+
+
+def cute_handheld_screen(img: Image.Image) -> Image.Image:
+    screen = img.convert('RGB')
+    screen = ImageOps.colorize(ImageOps.grayscale(screen), black=(15, 45, 15), white=(186, 220, 120))
+    screen = ImageEnhance.Contrast(screen).enhance(1.18)
+    w, h = screen.size
+    bezel = max(18, int(min(w, h) * 0.08))
+    footer = int(bezel * 1.35)
+    canvas = Image.new('RGB', (w + bezel * 2, h + bezel * 2 + footer), (198, 188, 165))
+    draw = ImageDraw.Draw(canvas)
+    draw.rounded_rectangle((0, 0, canvas.width - 1, canvas.height - 1), radius=max(18, bezel), fill=(208, 200, 182), outline=(110, 104, 95), width=2)
+    screen_box = (bezel, bezel, bezel + w, bezel + h)
+    draw.rounded_rectangle((screen_box[0] - 6, screen_box[1] - 6, screen_box[2] + 6, screen_box[3] + 6), radius=12, fill=(70, 74, 60))
+    canvas.paste(screen, (screen_box[0], screen_box[1]))
+    sc = canvas.crop(screen_box)
+    sc = cute_crt(sc)
+    canvas.paste(sc, (screen_box[0], screen_box[1]))
+    cy = h + bezel * 2 + footer // 2
+    draw.ellipse((bezel + 20, cy - 12, bezel + 44, cy + 12), fill=(150, 145, 135), outline=(88, 83, 77))
+    draw.ellipse((bezel + 56, cy - 12, bezel + 80, cy + 12), fill=(150, 145, 135), outline=(88, 83, 77))
+    bx = canvas.width - bezel - 86
+    draw.ellipse((bx, cy - 22, bx + 30, cy + 8), fill=(165, 98, 108), outline=(100, 64, 68))
+    draw.ellipse((bx + 36, cy - 8, bx + 66, cy + 22), fill=(165, 98, 108), outline=(100, 64, 68))
+    return canvas
+
+
+def cute_postcard_frame(img: Image.Image) -> Image.Image:
+    photo = img.convert('RGB')
+    photo = ImageEnhance.Color(photo).enhance(1.05)
+    w, h = photo.size
+    border = max(28, int(min(w, h) * 0.08))
+    caption_h = max(36, int(border * 1.6))
+    canvas = Image.new('RGB', (w + border * 2, h + border * 2 + caption_h), (250, 246, 238))
+    draw = ImageDraw.Draw(canvas)
+    canvas.paste(photo, (border, border))
+    draw.rectangle((border - 1, border - 1, border + w, border + h), outline=(218, 208, 192), width=1)
+    draw.rectangle((0, 0, canvas.width - 1, canvas.height - 1), outline=(225, 215, 200), width=2)
+    sx0 = canvas.width - border - 46
+    sy0 = border + 10
+    for i in range(6):
+        draw.arc((sx0 - 6, sy0 - 6 + i * 6, sx0 + 42, sy0 + 20 + i * 6), start=80, end=280, fill=(170, 120, 120), width=1)
+    draw.rectangle((sx0, sy0, sx0 + 36, sy0 + 46), outline=(180, 110, 110), width=2)
+    y = h + border + caption_h // 2
+    draw.line((border + 20, y, canvas.width - border - 20, y), fill=(208, 196, 180), width=1)
+    return canvas
+
+
+def cute_creepy(img: Image.Image) -> Image.Image:
+    base = img.convert('RGB')
+    base = ImageEnhance.Color(base).enhance(0.72)
+    base = ImageEnhance.Contrast(base).enhance(1.25)
+    base = ImageEnhance.Sharpness(base).enhance(1.2)
+    overlay = Image.new('RGB', base.size, (40, 65, 95))
+    cold = _soft_light_blend(base, overlay, 0.22)
+    cold = _add_vignette(cold, 0.42)
+    noise = Image.effect_noise(cold.size, 8).convert('L')
+    noise = ImageEnhance.Contrast(noise).enhance(1.6)
+    noise_rgb = Image.merge('RGB', (noise, noise, noise))
+    cold = Image.blend(cold, noise_rgb, 0.06)
+    r, g, b = cold.split()
+    r = ImageChops.offset(r, -2, 0)
+    g = ImageChops.offset(g, 1, 0)
+    return Image.merge('RGB', (r, g, b))
+
+
+def cute_yellowed_photo(img: Image.Image) -> Image.Image:
+    gray = ImageOps.grayscale(img.convert('RGB'))
+    sepia = ImageOps.colorize(gray, black=(80, 60, 35), white=(250, 235, 190))
+    sepia = ImageEnhance.Contrast(sepia).enhance(0.92)
+    sepia = ImageEnhance.Brightness(sepia).enhance(1.04)
+    sepia = _add_vignette(sepia, 0.18)
+    paper = Image.effect_noise(sepia.size, 5).convert('L')
+    paper = ImageEnhance.Contrast(paper).enhance(0.5)
+    paper_rgb = Image.merge('RGB', (paper, paper, paper))
+    return Image.blend(sepia, paper_rgb, 0.045)
+
+
+def _color_dodge(base: Image.Image, blend: Image.Image) -> Image.Image:
+    """Color-dodge two 'L' images: base * 255 / (255 - blend), saturating at 255."""
+    g = np.asarray(base, dtype=np.int32)
+    b = np.asarray(blend, dtype=np.int32)
+    dodged = np.minimum(255, (g * 255) // np.maximum(1, 255 - b))
+    dodged[b >= 255] = 255
+    return Image.fromarray(dodged.astype(np.uint8), 'L')
+
+
+def cute_drawing(img: Image.Image) -> Image.Image:
+    rgb = img.convert('RGB')
+    gray = ImageOps.grayscale(rgb)
+    inv = ImageOps.invert(gray)
+    blur = inv.filter(ImageFilter.GaussianBlur(radius=12))
+    out = _color_dodge(gray, blur)
+    edges = gray.filter(ImageFilter.FIND_EDGES)
+    edges = ImageOps.invert(edges)
+    edges = ImageEnhance.Contrast(edges).enhance(1.8)
+    merged = Image.blend(out, edges, 0.18)
+    return Image.merge('RGB', (merged, merged, merged))
+
+
+@profiled()
+def apply_cute_mode(img: Image.Image, cute_mode: str) -> Image.Image:
+    cute_mode = (cute_mode or "None").strip()
+    if cute_mode == "None":
+        return img
+    if cute_mode == "Pastel":
+        return cute_pastel(img)
+    if cute_mode == "Cute":
+        return cute_kawaii(img)
+    if cute_mode == "CRT":
+        return cute_crt(img)
+    if cute_mode == "Sticker Outline":
+        return cute_sticker_outline(img)
+    if cute_mode == "Handheld Screen":
+        return cute_handheld_screen(img)
+    if cute_mode == "Postcard Frame":
+        return cute_postcard_frame(img)
+    if cute_mode == "Creepy":
+        return cute_creepy(img)
+    if cute_mode == "Yellowed Photo":
+        return cute_yellowed_photo(img)
+    if cute_mode == "Drawing":
+        return cute_drawing(img)
+    return img
+
+
+PALETTE_LOADERS = {".gpl": load_gpl, ".pal": load_jasc_pal, ".hex": load_hex, ".act": load_act, ".ase": load_ase}
+PALETTE_EXTENSIONS = tuple(PALETTE_LOADERS)
+
+
+def load_palette_file(path: str):
+    """Load a .gpl, JASC .pal, .hex, Adobe .act or .ase palette file based on its extension."""
+    loader = PALETTE_LOADERS.get(os.path.splitext(path)[1].lower())
+    if loader is None:
+        raise ValueError("Unsupported extension")
+    return loader(path)
+
+
+def style_file_stem(style: str, cute_mode: str) -> str:
+    safe = style.replace('/', '-').replace('(', '').replace(')', '').replace(',', '').replace(' ', '_')
+    cute = (cute_mode or "None").replace(' ', '_')
+    return f"{safe}__{cute}"
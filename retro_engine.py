@@ -0,0 +1,721 @@
+# Parallel render engine: spreads (image, style, cute mode) jobs across a process pool.
+# Sources are shared with the workers through shared memory (or opened by path), never pickled as PIL objects.
+import os
+import queue
+import weakref
+import hashlib
+import threading
+import time
+import multiprocessing
+from collections import namedtuple, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+from retro_core import (apply_style, apply_cute_mode, pixelate_stage, reduce_colors, dither_mode, get_style,
+                        sample_palette, SourceImage)
+
+# source is a file path, a PIL image or a SourceImage (decoded at full size when the job runs);
+# options are the extra apply_style keyword arguments.
+# With out_path set the worker saves the render itself and only the path travels back.
+RenderJob = namedtuple("RenderJob", "source style pixel_size dither options cute_mode out_path")
+RenderJob.__new__.__defaults__ = (None, "None", None)
+RenderResult = namedtuple("RenderResult", "image path error")
+
+_worker_source = {"key": None, "image": None}
+
+
+def default_worker_count():
+    return max(1, os.cpu_count() or 1)
+
+
+def _load_source(ref):
+    kind, payload = ref
+    if kind == "image":
+        return payload, None
+    if kind == "path":
+        if _worker_source["key"] != ref:
+            with Image.open(payload) as im:
+                _worker_source["image"] = im.convert('RGB')
+            _worker_source["key"] = ref
+        return _worker_source["image"], None
+    name, mode, size = payload
+    shm = shared_memory.SharedMemory(name=name)
+    return Image.frombuffer(mode, size, shm.buf, 'raw', mode, 0, 1), shm
+
+
+def resolve_palette(job: RenderJob, source=None) -> RenderJob:
+    """Replace the reuse_palette option by the adaptive palette picked once for the job's source.
+
+    With options["reuse_palette"] set, adaptive styles map onto SourceImage.palette (or sample_palette of a
+    plain image) instead of running a median cut per render, so previews and saves share their colors.
+    source overrides job.source; pass the original, not a preview-sized copy.
+    """
+    options = job.options or {}
+    if "reuse_palette" not in options:
+        return job
+    options = dict(options)
+    reuse = options.pop("reuse_palette")
+    if reuse and options.get("adaptive_palette") is None and get_style(job.style).adaptive:
+        src = job.source if source is None else source
+        if isinstance(src, str):
+            src = SourceImage(src)
+        if isinstance(src, SourceImage):
+            palette = src.palette(job.style, **options)
+        else:
+            palette = sample_palette(src, job.style, **options)
+        if palette is not None:
+            options["adaptive_palette"] = palette
+    return job._replace(options=options)
+
+
+def render_image(job: RenderJob, source=None) -> Image.Image:
+    """Render a job in the current process; source overrides job.source (e.g. a preview-sized copy)."""
+    img = job.source if source is None else source
+    job = resolve_palette(job, img)
+    out = apply_style(img, job.style, job.pixel_size, job.dither, **(job.options or {}))
+    return apply_cute_mode(out, job.cute_mode)
+
+
+def _render_job(ref, style, pixel_size, dither, options, cute_mode, out_path):
+    img, shm = _load_source(ref)
+    try:
+        out = render_image(RenderJob(img, style, pixel_size, dither, options, cute_mode))
+    finally:
+        if shm is not None:
+            del img
+            shm.close()
+    if out_path:
+        _save_render(out, out_path)
+        return None
+    return out.mode, out.size, out.tobytes()
+
+
+def _share_image(img: Image.Image):
+    """Copy img's pixels into a new shared memory block; returns (block, source ref for the workers)."""
+    data = img.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    shm.buf[:len(data)] = data
+    return shm, ("shm", (shm.name, img.mode, img.size))
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+def output_stems(entries, taken=None):
+    """(path, relative_dir, stem) for (path, relative_dir) entries, stems unique per output folder.
+
+    Inputs that would share a name (a.png and a.jpg, or the same file name from two globs) keep their
+    extension in the stem (a_png, a_jpg) and, if that still clashes, get a counter (a_png_2). taken maps the
+    stems already written by earlier calls (as os.path.join(relative_dir, stem), normcased) to their source and
+    is updated in place, so a later call never reuses another input's name; the same source keeps its stem.
+    """
+    entries = list(entries)
+    taken = {} if taken is None else taken
+
+    def key(rel_dir, stem):
+        return os.path.normcase(os.path.join(rel_dir, stem))
+
+    def source(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    sources = {}
+    for path, rel_dir in entries:
+        sources.setdefault(key(rel_dir, os.path.splitext(os.path.basename(path))[0]), set()).add(source(path))
+    out = []
+    for path, rel_dir in entries:
+        stem, ext = os.path.splitext(os.path.basename(path))
+        own = source(path)
+
+        def free(name):
+            k = key(rel_dir, name)
+            if k in taken:
+                return taken[k] == own
+            return sources.get(k, {own}) == {own}
+
+        if not free(stem):
+            stem = f"{stem}_{ext.lstrip('.').lower()}" if ext else stem
+            unique, n = stem, 1
+            while not free(unique):
+                n += 1
+                unique = f"{stem}_{n}"
+            stem = unique
+        taken[key(rel_dir, stem)] = own
+        out.append((path, rel_dir, stem))
+    return out
+
+
+def _save_render(out: Image.Image, out_path: str):
+    if os.path.splitext(out_path)[1].lower() in (".jpg", ".jpeg") and out.mode != 'RGB':
+        out = out.convert('RGB')
+    out.save(out_path)
+
+
+# ---- content-addressed render cache ----
+RENDER_CACHE_BYTES = 384 * 1024 * 1024
+
+
+def _image_nbytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+class RenderCache:
+    """In-memory LRU of rendered images and intermediate pipeline stages, bounded by a byte budget.
+
+    Keys hash the source pixels together with every render parameter (style, pixel size, dither,
+    apply_style options including the custom palette colors, cute mode), so an identical request is
+    served from memory whichever image object it came from. Each stage (pixelate, color-reduce, cute
+    post-process, plus any caller stages such as downscale or preview fit) is keyed on its input's key
+    and its own parameters, so changing one parameter only recomputes the stages after it. Thread-safe.
+    """
+
+    def __init__(self, max_bytes=RENDER_CACHE_BYTES):
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stage_counts = {}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def source_digest(self, img: Image.Image) -> str:
+        """Hash of an image's pixels, remembered for as long as the image object is alive."""
+        key = id(img)
+        with self._lock:
+            entry = self._digests.get(key)
+            if entry is not None and entry[0]() is img:
+                return entry[1]
+        digest = hashlib.blake2b(img.tobytes(), digest_size=16)
+        digest.update(repr((img.mode, img.size)).encode())
+        digest = digest.hexdigest()
+        with self._lock:
+            self._digests[key] = (weakref.ref(img, lambda _, key=key: self._digests.pop(key, None)), digest)
+        return digest
+
+    def _chain(self, parent_key: str, stage: str, params) -> str:
+        digest = hashlib.blake2b(parent_key.encode(), digest_size=16)
+        digest.update(repr((stage, params)).encode())
+        return digest.hexdigest()
+
+    def job_stages(self, job: RenderJob):
+        """(stage, params) of the pipeline after the source: pixelate -> color-reduce -> cute post-process."""
+        options = dict(job.options or {})
+        for name in ("custom_palette", "adaptive_palette"):
+            if options.get(name) is not None:
+                options[name] = tuple(tuple(c) for c in options[name])
+        # only the options the style reads go into the key, so e.g. NES emphasis does not re-render PICO-8
+        style = get_style(job.style)
+        used = set(style.options) | {"grid_space"} | ({"adaptive_palette", "reuse_palette"} if style.adaptive else set())
+        options = {k: v for k, v in options.items() if k in used}
+        grid_space = bool(options.get("grid_space", False))
+        stages = [
+            ("pixelate", (int(job.pixel_size), grid_space)),
+            ("reduce", (job.style, dither_mode(job.dither), sorted(options.items()))),
+        ]
+        if (job.cute_mode or "None") != "None":
+            stages.append(("cute", job.cute_mode))
+        return stages
+
+    def key(self, job: RenderJob, source=None, source_key=None) -> str:
+        key = source_key or self.source_digest(job.source if source is None else source)
+        for stage, params in self.job_stages(job):
+            key = self._chain(key, stage, params)
+        return key
+
+    def get(self, key):
+        with self._lock:
+            img = self._lookup(key)
+            if img is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return img
+
+    def _lookup(self, key):
+        img = self._entries.get(key)
+        if img is not None:
+            self._entries.move_to_end(key)
+        return img
+
+    def put(self, key, img: Image.Image):
+        size = _image_nbytes(img)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= _image_nbytes(old)
+            self._entries[key] = img
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _image_nbytes(evicted)
+                self.evictions += 1
+
+    def stage(self, parent_key: str, stage: str, params, compute):
+        """Memoized pipeline stage: returns (key, image), calling compute() only if the stage's
+        input key and params have not been seen (or were evicted)."""
+        key = self._chain(parent_key, stage, params)
+        with self._lock:
+            img = self._lookup(key)
+            counts = self.stage_counts.setdefault(stage, [0, 0])
+            counts[0 if img is not None else 1] += 1
+        if img is None:
+            img = compute()
+            self.put(key, img)
+        return key, img
+
+    def render_with_key(self, job: RenderJob, source=None, source_key=None):
+        """Like render(), also returning the cache key of the result for chaining further stages."""
+        img = job.source if source is None else source
+        key = source_key or self.source_digest(img)
+        final_key = self.key(job, source_key=key)
+        out = self.get(final_key)
+        if out is not None:
+            return final_key, out
+        stages = self.job_stages(job)
+        job = resolve_palette(job, img)
+        options = dict(job.options or {})
+        key, work = self.stage(key, *stages[0], lambda: pixelate_stage(img, job.pixel_size, options.get("grid_space", False)))
+        key, work = self.stage(key, *stages[1], lambda: reduce_colors(work, job.style, job.dither, pixel_size=job.pixel_size,
+                                                                      out_size=img.size, **options))
+        if len(stages) > 2:
+            key, work = self.stage(key, *stages[2], lambda: apply_cute_mode(work, job.cute_mode))
+        return key, work
+
+    def render(self, job: RenderJob, source=None, source_key=None) -> Image.Image:
+        """Return the render of job (on source, if given), recomputing only the stages not in the cache.
+
+        source_key lets a caller that already knows the source's cache key (e.g. the output of a cached
+        downscale stage) skip hashing its pixels.
+        """
+        return self.render_with_key(job, source, source_key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                "stages": {name: {"hits": h, "misses": m} for name, (h, m) in self.stage_counts.items()},
+            }
+
+
+class RenderEngine:
+    """Runs RenderJobs on a lazily started ProcessPoolExecutor, returning results in job order.
+
+    With a RenderCache, jobs on in-memory sources are answered from it when possible, and renders done
+    in this process are stored in it. Safe to share between threads. If a worker dies the pool is replaced
+    by a new one and the jobs it took down are run once more.
+    """
+
+    def __init__(self, max_workers=None, cache=None):
+        self.max_workers = max(1, int(max_workers or default_worker_count()))
+        self.cache = cache
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn keeps workers independent of Tk and of any threads in the parent
+                ctx = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+            return self._executor
+
+    def _discard(self, pool):
+        with self._lock:
+            if self._executor is not pool:
+                return  # another thread already replaced it
+            self._executor = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, ref, job):
+        # a broken pool (a worker died) refuses new work, so start a new one in its place
+        pool = self._pool()
+        try:
+            return pool.submit(_render_job, ref, job.style, job.pixel_size, job.dither, job.options, job.cute_mode,
+                               job.out_path)
+        except BrokenProcessPool:
+            self._discard(pool)
+            return self._pool().submit(_render_job, ref, job.style, job.pixel_size, job.dither, job.options,
+                                       job.cute_mode, job.out_path)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._executor = self._executor, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, jobs, progress=None, cancel_event=None):
+        """Render jobs, calling progress(done, total, index, result) as each finishes.
+
+        Returns a list aligned with jobs; cancelled jobs are left as None.
+        """
+        jobs = [resolve_palette(job)._replace(source=job.source.full()) if isinstance(job.source, SourceImage) else job
+                for job in jobs]
+        results = [None] * len(jobs)
+        todo = list(range(len(jobs)))
+        counter = {"done": 0}
+
+        def finished(i, result):
+            results[i] = result
+            counter["done"] += 1
+            if progress:
+                progress(counter["done"], len(jobs), i, result)
+
+        if self.cache is not None:
+            todo = self._serve_from_cache(jobs, todo, finished)
+        if not todo:
+            return results
+        inline = self.max_workers == 1 or len(todo) == 1
+        shared = {}
+        refs = {}
+        try:
+            for i in todo:
+                source = jobs[i].source
+                if isinstance(source, str):
+                    refs[i] = ("path", source)
+                elif inline:
+                    refs[i] = ("image", source)
+                else:
+                    if id(source) not in shared:
+                        shared[id(source)] = _share_image(source)
+                    refs[i] = shared[id(source)][1]
+            if inline:
+                self._run_inline(jobs, todo, refs, finished, cancel_event)
+            else:
+                self._run_pool(jobs, todo, refs, finished, cancel_event)
+        finally:
+            for shm, _ in shared.values():
+                _release(shm)
+        return results
+
+    def imap(self, jobs, max_pending=None):
+        """Render an iterable of jobs lazily, yielding a RenderResult per job in job order.
+
+        At most max_pending jobs (default two per worker) are taken from jobs and in flight at once,
+        so a long frame sequence streams through in bounded memory.
+        """
+        max_pending = max(1, int(max_pending or 2 * self.max_workers))
+        if self.max_workers == 1:
+            for job in jobs:
+                yield self._render_here(job)
+            return
+        jobs = iter(jobs)
+        pending = deque()
+        try:
+            while True:
+                for job in jobs:
+                    if isinstance(job.source, SourceImage):
+                        job = resolve_palette(job)._replace(source=job.source.full())
+                    shm, ref = (None, ("path", job.source)) if isinstance(job.source, str) else _share_image(job.source)
+                    pending.append((self._submit(ref, job), shm, ref, job))
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    return
+                fut, shm, ref, job = pending.popleft()
+                try:
+                    try:
+                        payload = fut.result()
+                    except BrokenProcessPool:
+                        payload = self._submit(ref, job).result()
+                    result = self._finish(job, payload, None)
+                except Exception as e:
+                    result = self._finish(job, None, e)
+                finally:
+                    if shm is not None:
+                        _release(shm)
+                yield result
+        finally:
+            for fut, _, _, _ in pending:
+                fut.cancel()
+            wait([fut for fut, _, _, _ in pending])
+            for _, shm, _, _ in pending:
+                if shm is not None:
+                    _release(shm)
+
+    def _render_here(self, job):
+        source = job.source.full() if isinstance(job.source, SourceImage) else job.source
+        ref = ("path", source) if isinstance(source, str) else ("image", source)
+        try:
+            payload = _render_job(ref, job.style, job.pixel_size, job.dither, job.options, job.cute_mode, job.out_path)
+            return self._finish(job, payload, None)
+        except Exception as e:
+            return self._finish(job, None, e)
+
+    def _serve_from_cache(self, jobs, todo, finished):
+        missing = []
+        for i in todo:
+            job = jobs[i]
+            img = None if isinstance(job.source, str) else self.cache.get(self.cache.key(job))
+            if img is None:
+                missing.append(i)
+                continue
+            try:
+                if job.out_path:
+                    _save_render(img, job.out_path)
+                    finished(i, RenderResult(None, job.out_path, None))
+                else:
+                    finished(i, RenderResult(img, None, None))
+            except Exception as e:
+                finished(i, RenderResult(None, None, e))
+        return missing
+
+    def _finish(self, job, payload, error):
+        if error is not None:
+            return RenderResult(None, None, error)
+        if job.out_path:
+            return RenderResult(None, job.out_path, None)
+        mode, size, data = payload
+        return RenderResult(Image.frombytes(mode, size, data), None, None)
+
+    def _run_inline(self, jobs, todo, refs, finished, cancel_event):
+        for i in todo:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            job = jobs[i]
+            try:
+                if self.cache is not None and refs[i][0] == "image":
+                    # rendered in this process, so keep it for the next identical request
+                    img = self.cache.render(job)
+                    if job.out_path:
+                        _save_render(img, job.out_path)
+                        result = RenderResult(None, job.out_path, None)
+                    else:
+                        result = RenderResult(img, None, None)
+                else:
+                    payload = _render_job(refs[i], job.style, job.pixel_size, job.dither, job.options,
+                                          job.cute_mode, job.out_path)
+                    result = self._finish(job, payload, None)
+            except Exception as e:
+                result = self._finish(job, None, e)
+            finished(i, result)
+
+    def _run_pool(self, jobs, todo, refs, finished, cancel_event):
+        pending = {self._submit(refs[i], jobs[i]): i for i in todo}
+        retried = set()
+        try:
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = pending.pop(fut)
+                    try:
+                        result = self._finish(jobs[i], fut.result(), None)
+                    except BrokenProcessPool as e:
+                        if i in retried:
+                            result = self._finish(jobs[i], None, e)
+                        else:
+                            retried.add(i)
+                            pending[self._submit(refs[i], jobs[i])] = i
+                            continue
+                    except Exception as e:
+                        result = self._finish(jobs[i], None, e)
+                    finished(i, result)
+        finally:
+            for fut in pending:
+                fut.cancel()
+            # shared memory is released by run(), so let running jobs drain first
+            wait(pending)
+
+
+class LatestRenderWorker:
+    """Background thread that only ever works on the newest submitted task.
+
+    submit() bumps a generation counter; a task still queued is replaced and a running one is superseded.
+    Tasks are called as task(emit, cancelled): emit(value) posts a result, cancelled() reports whether a
+    newer task was submitted. Results of stale generations are dropped; the UI thread collects the rest
+    with drain().
+    """
+
+    def __init__(self, name="render-worker"):
+        self.name = name
+        self.generation = 0
+        self._cond = threading.Condition()
+        self._task = None
+        self._running = False
+        self._results = queue.Queue()
+        self._thread = None
+
+    def submit(self, task) -> int:
+        with self._cond:
+            self.generation += 1
+            self._task = (self.generation, task)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+            return self.generation
+
+    def cancel(self):
+        with self._cond:
+            self.generation += 1
+            self._task = None
+
+    def busy(self) -> bool:
+        with self._cond:
+            return self._task is not None or self._running or not self._results.empty()
+
+    def drain(self):
+        """Return the (kind, value) events of the current generation; kind is "result" or "error"."""
+        events = []
+        while True:
+            try:
+                gen, kind, value = self._results.get_nowait()
+            except queue.Empty:
+                return events
+            if gen == self.generation:
+                events.append((kind, value))
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._task is None:
+                    self._running = False
+                    self._cond.wait()
+                gen, task = self._task
+                self._task = None
+                self._running = True
+
+            def cancelled(gen=gen):
+                return gen != self.generation
+
+            def emit(value, gen=gen):
+                if not cancelled(gen):
+                    self._results.put((gen, "result", value))
+
+            try:
+                task(emit, cancelled)
+            except Exception as e:
+                if not cancelled(gen):
+                    self._results.put((gen, "error", e))
+
+
+class BatchQueue:
+    """Render queue fed from any thread, worked off by one background thread through engine.imap.
+
+    add() enqueues jobs (with out_path set) and returns their ids; workers decode, render and save, so file I/O
+    of one job overlaps the rendering of the others. The UI thread collects (kind, id, value) events with
+    drain(), kind being "queued" (value: the job), "rendering", "done", "error" (value: the exception) or
+    "cancelled", and reads totals and throughput with stats().
+    """
+
+    def __init__(self, engine_factory, max_pending=None, name="batch-queue"):
+        self.engine_factory = engine_factory
+        self.max_pending = max_pending
+        self.name = name
+        self._jobs = deque()
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._thread = None
+        self._cancelled = threading.Event()
+        self._next_id = 0
+        self._counts = {"queued": 0, "rendering": 0, "done": 0, "failed": 0}
+        self._started = None
+        self._finished = None
+
+    def add(self, jobs):
+        ids = []
+        with self._lock:
+            if self._thread is None:
+                self._cancelled.clear()
+                self._started = time.perf_counter()
+                self._counts.update(done=0, failed=0)
+            for job in jobs:
+                self._jobs.append((self._next_id, job))
+                ids.append(self._next_id)
+                self._events.put(("queued", self._next_id, job))
+                self._next_id += 1
+            self._counts["queued"] += len(ids)
+            if ids and self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+        return ids
+
+    def cancel(self):
+        """Drop the queued jobs and stop after the ones being rendered."""
+        with self._lock:
+            dropped, self._jobs = list(self._jobs), deque()
+            self._counts["queued"] -= len(dropped)
+            self._cancelled.set()
+        for job_id, _ in dropped:
+            self._events.put(("cancelled", job_id, None))
+
+    def busy(self) -> bool:
+        with self._lock:
+            return self._thread is not None or not self._events.empty()
+
+    def drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._counts)
+            end = self._finished if self._thread is None else time.perf_counter()
+            elapsed = (end - self._started) if self._started is not None and end is not None else 0.0
+        finished = counts["done"] + counts["failed"]
+        counts.update(seconds=elapsed, per_second=finished / elapsed if elapsed > 0 else 0.0)
+        return counts
+
+    def _take(self, in_flight):
+        # never blocks: when the queue runs dry imap finishes the jobs in flight and _loop looks again
+        while not self._cancelled.is_set():
+            with self._lock:
+                if not self._jobs:
+                    return
+                job_id, job = self._jobs.popleft()
+                self._counts["queued"] -= 1
+                self._counts["rendering"] += 1
+            in_flight.append(job_id)
+            self._events.put(("rendering", job_id, None))
+            yield job
+
+    def _loop(self):
+        engine = self.engine_factory()
+        while True:
+            in_flight = deque()
+            try:
+                for result in engine.imap(self._take(in_flight), self.max_pending):
+                    self._record(in_flight.popleft(), result.error)
+                    if self._cancelled.is_set():
+                        break
+            except Exception as e:
+                while in_flight:
+                    self._record(in_flight.popleft(), e)
+            while in_flight:
+                self._record(in_flight.popleft(), None, cancelled=True)
+            with self._lock:
+                if not self._jobs:
+                    self._thread = None
+                    self._finished = time.perf_counter()
+                    return
+                # anything still queued was added after a cancel
+                self._cancelled.clear()
+
+    def _record(self, job_id, error, cancelled=False):
+        kind = "cancelled" if cancelled else "error" if error is not None else "done"
+        with self._lock:
+            self._counts["rendering"] -= 1
+            if not cancelled:
+                self._counts["failed" if error is not None else "done"] += 1
+        self._events.put((kind, job_id, error))
@@ -0,0 +1,1136 @@
+# Tk GUI of RetroImageMaker, started through RetroImageMaker.py (make sure pillow and tkinterdnd2 are installed).
+# Only main() there imports this module, so render worker processes never load tkinter.
+import os
+import re
+import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, colorchooser
+
+try:
+    from tkinterdnd2 import TkinterDnD, DND_FILES
+    HAS_DND = True
+except Exception:
+    TkinterDnD = None
+    DND_FILES = None
+    HAS_DND = False
+
+from PIL import ImageTk
+
+from retro_core import (
+    PREVIEW_SIZE, GRID_THUMB_SIZE, CUSTOM_PALETTES, DEFAULT_CUSTOM_NAME, CUTE_MODES, STYLES, DITHER_MODES,
+    clamp8, parse_hex_color, to_hex, load_palette_file, save_gpl, save_jasc_pal,
+    MAX_PREVIEW_PROCESS_SIZE, PREVIEW_LEVELS,
+    fit_image_for_preview, scaled_pixel_size,
+    style_file_stem, get_style, SourceImage, IMAGE_EXTENSIONS,
+)
+import retro_profile
+from retro_engine import (RenderEngine, RenderJob, RenderCache, LatestRenderWorker, BatchQueue, default_worker_count,
+                          resolve_palette, output_stems)
+from retro_palettes import PaletteLibrary, scan_palettes
+
+APP_TITLE = "RetroImageMaker"
+
+CUTE_MODE_SHORTCUTS = [
+    ("Pastel", "Pastel"),
+    ("Cute", "Cute"),
+    ("CRT", "CRT"),
+    ("Sticker", "Sticker Outline"),
+    ("Handheld", "Handheld Screen"),
+    ("Postcard", "Postcard Frame"),
+    ("Creepy", "Creepy"),
+    ("Yellowed", "Yellowed Photo"),
+    ("Drawing", "Drawing"),
+]
+
+
+
+# ---------------- drag & drop helpers ----------------
+
+def parse_dnd_files(data: str):
+    """Parse TkDND file data into file paths."""
+    if not data:
+        return []
+    data = data.strip()
+    out = []
+    token_re = re.compile(r'\{[^}]*\}|\S+')
+    for token in token_re.findall(data):
+        token = token.strip()
+        if token.startswith('{') and token.endswith('}'):
+            token = token[1:-1]
+        token = token.strip()
+        if token:
+            out.append(token)
+    return out
+
+
+# Palette editor stuff
+class PaletteEditor(tk.Toplevel):
+    SWATCH_SIZE = 22
+    COLS = 16
+    SCAN_POLL_MS = 100
+    FORMATS_HINT = "(.gpl, JASC .pal, .act, .ase, .hex)"
+
+    def __init__(self, parent, palettes_dict: PaletteLibrary, selected_name: str, on_commit):
+        super().__init__(parent)
+        self.title("Palette Editor")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.grab_set()
+        self.palettes = palettes_dict
+        self.on_commit = on_commit
+        self.name_var = tk.StringVar(value=selected_name if selected_name in self.palettes else DEFAULT_CUSTOM_NAME)
+        self.hex_var = tk.StringVar(value="#FFFFFF")
+        self.selected_index = None
+        self.scan_cancel = None
+
+        top = ttk.Frame(self, padding=10)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text="Palette:").grid(row=0, column=0, sticky="w", padx=(0, 4))
+        self.name_cb = ttk.Combobox(top, state="readonly", values=list(self.palettes.keys()), textvariable=self.name_var, width=28)
+        self.name_cb.grid(row=0, column=1, sticky="w")
+        self.name_cb.bind("<<ComboboxSelected>>", lambda e: self._reload_grid())
+        ttk.Button(top, text="New…", command=self._new_palette).grid(row=0, column=2, padx=4)
+        ttk.Button(top, text="Rename…", command=self._rename_palette).grid(row=0, column=3, padx=4)
+        ttk.Button(top, text="Delete", command=self._delete_palette).grid(row=0, column=4, padx=4)
+
+        grid_frame = ttk.LabelFrame(self, text="Colors", padding=10)
+        grid_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.grid_frame = grid_frame
+
+        ctrl = ttk.Frame(self, padding=(10, 0, 10, 10))
+        ctrl.pack(fill=tk.X)
+        ttk.Label(ctrl, text="Hex:").grid(row=0, column=0, sticky="e")
+        hex_entry = ttk.Entry(ctrl, textvariable=self.hex_var, width=10)
+        hex_entry.grid(row=0, column=1, sticky="w", padx=(4, 8))
+        ttk.Button(ctrl, text="Add / Replace", command=self._add_or_replace_from_hex).grid(row=0, column=2, padx=4)
+        ttk.Button(ctrl, text="Eyedropper…", command=self._eyedropper).grid(row=0, column=3, padx=4)
+        ttk.Button(ctrl, text="Remove", command=self._remove_selected).grid(row=0, column=4, padx=4)
+        ttk.Button(ctrl, text="Up", command=lambda: self._move_selected(-1)).grid(row=0, column=5, padx=2)
+        ttk.Button(ctrl, text="Down", command=lambda: self._move_selected(1)).grid(row=0, column=6, padx=2)
+        ttk.Button(ctrl, text="Clear", command=self._clear_palette).grid(row=0, column=7, padx=8)
+
+        bottom = ttk.Frame(self, padding=10)
+        bottom.pack(fill=tk.X)
+        ttk.Button(bottom, text="Import…", command=self._import_palette).pack(side=tk.LEFT)
+        self.import_folder_btn = ttk.Button(bottom, text="Import Folder…", command=self._import_folder)
+        self.import_folder_btn.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(bottom, text="Export…", command=self._export_palette).pack(side=tk.LEFT, padx=6)
+        self.info_label = ttk.Label(bottom, text=self.FORMATS_HINT, foreground="#555")
+        self.info_label.pack(side=tk.LEFT, padx=6)
+        ttk.Button(bottom, text="Use This Palette", command=self._commit).pack(side=tk.RIGHT)
+        ttk.Button(bottom, text="Close", command=self._close).pack(side=tk.RIGHT, padx=6)
+        self.protocol("WM_DELETE_WINDOW", self._close)
+
+        self._build_grid()
+        self._reload_grid()
+
+    def _build_grid(self):
+        for w in list(self.grid_frame.children.values()):
+            w.destroy()
+        self.swatch_btns = []
+        for i in range(256):
+            r = i // self.COLS
+            c = i % self.COLS
+            btn = tk.Label(self.grid_frame, width=2, height=1, relief="solid", bd=1, cursor="hand2")
+            btn.grid(row=r, column=c, padx=2, pady=2)
+            btn.bind("<Button-1>", lambda e, idx=i: self._on_swatch_click(idx))
+            self.swatch_btns.append(btn)
+
+    def _reload_grid(self):
+        name = self.name_var.get()
+        if name not in self.palettes:
+            self.palettes[name] = []
+        pal = self.palettes[name]
+        for i, btn in enumerate(self.swatch_btns):
+            if i < len(pal):
+                rgb = pal[i]
+                btn.configure(bg=to_hex(rgb))
+            else:
+                btn.configure(bg=self.cget("bg"))
+        self.selected_index = None
+        self.name_cb.configure(values=list(self.palettes.keys()))
+        self.name_cb.set(name)
+
+    def _on_swatch_click(self, idx: int):
+        name = self.name_var.get()
+        pal = self.palettes.get(name, [])
+        self.selected_index = idx if idx < len(pal) else None
+        if self.selected_index is not None:
+            self.hex_var.set(to_hex(pal[self.selected_index]))
+        for i, btn in enumerate(self.swatch_btns):
+            btn.configure(highlightthickness=2 if i == self.selected_index else 0, highlightbackground="#333")
+
+    def _add_or_replace_from_hex(self):
+        try:
+            rgb = parse_hex_color(self.hex_var.get())
+        except Exception as e:
+            messagebox.showerror("Hex error", str(e), parent=self)
+            return
+        name = self.name_var.get()
+        pal = self.palettes.get(name, [])
+        if self.selected_index is None:
+            if len(pal) >= 256:
+                messagebox.showinfo("Palette full", "Maximum 256 colors.", parent=self)
+                return
+            pal.append(rgb)
+        else:
+            pal[self.selected_index] = rgb
+        self.palettes[name] = pal
+        self._reload_grid()
+
+    def _eyedropper(self):
+        color = colorchooser.askcolor(parent=self, title="Pick a color")
+        if color and color[0] is not None:
+            r, g, b = [clamp8(v) for v in color[0]]
+            self.hex_var.set(to_hex((r, g, b)))
+            self._add_or_replace_from_hex()
+
+    def _remove_selected(self):
+        name = self.name_var.get()
+        pal = self.palettes.get(name, [])
+        if self.selected_index is not None and self.selected_index < len(pal):
+            pal.pop(self.selected_index)
+            self.selected_index = None
+            self._reload_grid()
+
+    def _move_selected(self, delta):
+        name = self.name_var.get()
+        pal = self.palettes.get(name, [])
+        i = self.selected_index
+        if i is None or i < 0 or i >= len(pal):
+            return
+        j = i + delta
+        if 0 <= j < len(pal):
+            pal[i], pal[j] = pal[j], pal[i]
+            self.selected_index = j
+            self._reload_grid()
+            self._on_swatch_click(j)
+
+    def _clear_palette(self):
+        name = self.name_var.get()
+        if messagebox.askyesno("Clear palette", f"Remove all colors from '{name}'?", parent=self):
+            self.palettes[name] = []
+            self.selected_index = None
+            self._reload_grid()
+
+    def _new_palette(self):
+        new_name = self._ask_text("New Palette", "Name:", default="New Palette")
+        if not new_name:
+            return
+        if new_name in self.palettes:
+            messagebox.showerror("Exists", "A palette with that name already exists.", parent=self)
+            return
+        self.palettes[new_name] = []
+        self.name_var.set(new_name)
+        self._reload_grid()
+
+    def _rename_palette(self):
+        curr = self.name_var.get()
+        new_name = self._ask_text("Rename Palette", "New name:", default=curr)
+        if not new_name or new_name == curr:
+            return
+        if new_name in self.palettes:
+            messagebox.showerror("Exists", "A palette with that name already exists.", parent=self)
+            return
+        self.palettes[new_name] = self.palettes.pop(curr)
+        self.name_var.set(new_name)
+        self._reload_grid()
+
+    def _delete_palette(self):
+        name = self.name_var.get()
+        if messagebox.askyesno("Delete palette", f"Delete '{name}'?", parent=self):
+            try:
+                del self.palettes[name]
+            except KeyError:
+                pass
+            if not self.palettes:
+                self.palettes[DEFAULT_CUSTOM_NAME] = []
+                self.name_var.set(DEFAULT_CUSTOM_NAME)
+            else:
+                self.name_var.set(list(self.palettes.keys())[0])
+            self._reload_grid()
+
+    def _import_palette(self):
+        path = filedialog.askopenfilename(
+            title="Import Palette",
+            filetypes=[("Palettes", ".gpl .pal .act .ase .hex"), ("GIMP/Aseprite .gpl", ".gpl"),
+                       ("JASC-PAL .pal", ".pal"), ("Adobe Color Table .act", ".act"),
+                       ("Adobe Swatch Exchange .ase", ".ase"), ("Hex list .hex", ".hex"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            pal = load_palette_file(path)
+            name = self.palettes.unique_name(os.path.splitext(os.path.basename(path))[0])
+            self.palettes[name] = pal
+            self.name_var.set(name)
+            self._reload_grid()
+        except Exception as e:
+            messagebox.showerror("Import failed", str(e), parent=self)
+
+    def _import_folder(self):
+        """Parse every palette file under a folder on a background thread, then add the new ones at once."""
+        folder = filedialog.askdirectory(title="Import all palettes in a folder", parent=self)
+        if not folder:
+            return
+        self.scan_cancel = threading.Event()
+        results = queue.Queue()
+
+        def work(cancelled=self.scan_cancel.is_set):
+            try:
+                for item in scan_palettes(folder, cancelled=cancelled):
+                    results.put(item)
+            finally:
+                results.put(None)
+
+        self.import_folder_btn.configure(state="disabled")
+        threading.Thread(target=work, name="palette-scan", daemon=True).start()
+        self._poll_scan(self.scan_cancel, results, [])
+
+    def _poll_scan(self, cancel, results, found):
+        if cancel.is_set():
+            return  # the editor was closed
+        done = False
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                done = True
+                break
+            found.append(item)
+        if not done:
+            self.info_label.configure(text=f"Scanning… {len(found)} file(s)")
+            self.after(self.SCAN_POLL_MS, lambda: self._poll_scan(cancel, results, found))
+            return
+        self.scan_cancel = None
+        self.import_folder_btn.configure(state="normal")
+        self.info_label.configure(text=self.FORMATS_HINT)
+        added, duplicates, failed = self.palettes.add_palettes(found)
+        if added:
+            self.name_var.set(added[0])
+            self._reload_grid()
+            self._save_library()
+        summary = f"Imported {len(added)} palette(s); {duplicates} duplicate(s) skipped."
+        if failed:
+            summary += f"\n{len(failed)} file(s) could not be read, e.g.\n" + "\n".join(
+                f"{os.path.basename(path)}: {error}" for path, error in failed[:5])
+        messagebox.showinfo("Import Folder", summary, parent=self)
+
+    def _export_palette(self):
+        name = self.name_var.get()
+        pal = self.palettes.get(name, [])
+        if not pal:
+            messagebox.showinfo("Empty palette", "Nothing to export.", parent=self)
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Palette",
+            defaultextension=".gpl",
+            initialfile=f"{name}.gpl",
+            filetypes=[("GIMP/Aseprite .gpl", ".gpl"), ("JASC-PAL .pal", ".pal"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            ext = os.path.splitext(path)[1].lower()
+            if ext == ".gpl":
+                save_gpl(path, pal, name=name)
+            elif ext == ".pal":
+                save_jasc_pal(path, pal)
+            else:
+                raise ValueError("Choose .gpl or .pal")
+            messagebox.showinfo("Exported", f"Saved palette to:\n{path}", parent=self)
+        except Exception as e:
+            messagebox.showerror("Export failed", str(e), parent=self)
+
+    def _save_library(self) -> bool:
+        try:
+            self.palettes.flush()
+            return True
+        except OSError as e:
+            messagebox.showerror("Palette library", f"Could not save palettes to {self.palettes.folder}:\n{e}",
+                                 parent=self)
+            return False
+
+    def _commit(self):
+        if callable(self.on_commit):
+            self.on_commit(self.name_var.get())
+        self._close()
+
+    def _close(self):
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+        self._save_library()
+        self.destroy()
+
+    def _ask_text(self, title, prompt, default=""):
+        win = tk.Toplevel(self)
+        win.title(title)
+        win.transient(self)
+        win.grab_set()
+        ttk.Label(win, text=prompt, padding=10).pack()
+        var = tk.StringVar(value=default)
+        entry = ttk.Entry(win, textvariable=var, width=30)
+        entry.pack(padx=10)
+        entry.focus_set()
+        btns = ttk.Frame(win, padding=10)
+        btns.pack()
+        out = {"val": None}
+
+        def ok():
+            out["val"] = var.get().strip()
+            win.destroy()
+
+        def cancel():
+            win.destroy()
+
+        ttk.Button(btns, text="OK", command=ok).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btns, text="Cancel", command=cancel).pack(side=tk.LEFT, padx=5)
+        self.wait_window(win)
+        return out["val"]
+
+
+class PixelArtApp:
+    PREVIEW_POLL_MS = 30
+
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        root.title(APP_TITLE)
+
+        # State
+        self.source_image = None
+        self.original_path = None
+        self.preview_photo = None
+        self.image_token = 0
+        self.compare_tiles = {}
+        self.compare_events = queue.Queue()
+        self.compare_pool = None
+        self.compare_poll_job = None
+        self.compare_source_lock = threading.Lock()
+        self.preview_job = None
+        self.preview_poll_job = None
+        self.preview_worker = LatestRenderWorker("preview-render")
+        self.render_engine = None
+        self.render_cache = RenderCache()
+        self.batch_queue = BatchQueue(self._get_render_engine, name="batch-render")
+        self.batch_rows = {}
+        self.batch_names = {}  # (folder, style stem) -> output_stems' taken map, so no job overwrites another's output
+        self.batch_poll_job = None
+
+        # Custom palette state
+        # saved palettes are listed at startup; their colors are read when first selected
+        self.custom_palettes = PaletteLibrary(defaults=CUSTOM_PALETTES)
+        self.current_palette_name = DEFAULT_CUSTOM_NAME if DEFAULT_CUSTOM_NAME in self.custom_palettes \
+            else next(iter(self.custom_palettes))
+
+        # Cute mode state
+        self.cute_mode_var = tk.StringVar(value="None")
+
+        # Status bar (stage timings)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(root, textvariable=self.status_var, anchor="w", padding=(8, 2), foreground="#666").pack(side=tk.BOTTOM, fill=tk.X)
+
+        # Notebook
+        self.nb = ttk.Notebook(root)
+        self.nb.pack(fill=tk.BOTH, expand=True)
+        self.single_tab = ttk.Frame(self.nb)
+        self.nb.add(self.single_tab, text="Single Style")
+        self.compare_tab = ttk.Frame(self.nb)
+        self.nb.add(self.compare_tab, text="Compare All")
+        self.batch_tab = ttk.Frame(self.nb)
+        self.nb.add(self.batch_tab, text="Batch")
+
+        controls = ttk.Frame(self.single_tab, padding=10)
+        controls.pack(side=tk.TOP, fill=tk.X)
+        self.load_btn = ttk.Button(controls, text="Load Image…", command=self.load_image)
+        self.load_btn.grid(row=0, column=0, padx=(0, 8), pady=4, sticky="w")
+
+        ttk.Label(controls, text="Style:").grid(row=0, column=1, padx=(0, 4), pady=4, sticky="e")
+        self.style_var = tk.StringVar(value=STYLES[0])
+        self.style_cb = ttk.Combobox(controls, textvariable=self.style_var, values=STYLES, state="readonly", width=36)
+        self.style_cb.grid(row=0, column=2, padx=(0, 8), pady=4, sticky="w")
+        self.style_cb.bind("<<ComboboxSelected>>", lambda e: (self._update_palette_visibility(), self.update_processing()))
+
+        # Palette section
+        self.palette_frame = ttk.Frame(controls)
+        self.palette_frame.grid(row=0, column=3, columnspan=3, sticky="w", padx=(0, 8))
+        ttk.Label(self.palette_frame, text="Palette:").grid(row=0, column=0, padx=(0, 4), pady=4, sticky="e")
+        self.palette_var = tk.StringVar(value=self.current_palette_name)
+        self.palette_cb = ttk.Combobox(self.palette_frame, textvariable=self.palette_var,
+                                       values=list(self.custom_palettes.keys()), state="readonly", width=24)
+        self.palette_cb.grid(row=0, column=1, padx=(0, 4), pady=4, sticky="w")
+        self.palette_cb.bind("<<ComboboxSelected>>", self._on_palette_changed)
+        self.edit_pal_btn = ttk.Button(self.palette_frame, text="Edit Palettes…", command=self.open_palette_editor)
+        self.edit_pal_btn.grid(row=0, column=2, padx=(0, 8), pady=4, sticky="w")
+
+        ttk.Label(controls, text="Pixel size:").grid(row=0, column=6, padx=(0, 4), pady=4, sticky="e")
+        self.pixel_var = tk.IntVar(value=12)
+        self.pixel_slider = ttk.Scale(controls, from_=4, to=48, orient=tk.HORIZONTAL, command=self.on_slider)
+        self.pixel_slider.grid(row=0, column=7, padx=(0, 8), pady=4, sticky="we")
+        controls.columnconfigure(7, weight=1)
+
+        self.pixel_label = ttk.Label(controls, text=f"{self.pixel_var.get()} px")
+        self.pixel_label.grid(row=0, column=8, padx=(0, 8), pady=4, sticky="w")
+        self.pixel_slider.set(self.pixel_var.get())
+
+        dither_frame = ttk.Frame(controls)
+        dither_frame.grid(row=0, column=9, padx=(0, 8), pady=4, sticky="w")
+        ttk.Label(dither_frame, text="Dither:").pack(side=tk.LEFT, padx=(0, 4))
+        self.dither_var = tk.StringVar(value=DITHER_MODES[0])
+        self.dither_cb = ttk.Combobox(dither_frame, textvariable=self.dither_var, values=DITHER_MODES, state="readonly", width=14)
+        self.dither_cb.pack(side=tk.LEFT)
+        self.dither_cb.bind("<<ComboboxSelected>>", lambda e: self.update_processing())
+        self.save_btn = ttk.Button(controls, text="Save Pixel Art…", command=self.save_image)
+        self.save_btn.grid(row=0, column=10, padx=(0, 8), pady=4, sticky="e")
+
+        # Cute modes section
+        cute = ttk.LabelFrame(self.single_tab, text="Preset Modes (one click)", padding=10)
+        cute.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(0, 10))
+
+        top_cute = ttk.Frame(cute)
+        top_cute.pack(fill=tk.X, pady=(0, 6))
+        ttk.Label(top_cute, text="Current:").pack(side=tk.LEFT)
+        self.cute_mode_cb = ttk.Combobox(top_cute, textvariable=self.cute_mode_var, values=CUTE_MODES, state="readonly", width=18)
+        self.cute_mode_cb.pack(side=tk.LEFT, padx=(6, 12))
+        self.cute_mode_cb.bind("<<ComboboxSelected>>", lambda e: self.update_processing())
+        ttk.Button(top_cute, text="Reset", command=lambda: self.set_cute_mode("None")).pack(side=tk.LEFT, padx=(0, 12))
+
+        cute_row_wrap = ttk.Frame(cute)
+        cute_row_wrap.pack(fill=tk.X)
+        self.cute_canvas = tk.Canvas(cute_row_wrap, height=42, highlightthickness=0, borderwidth=0)
+        self.cute_canvas.pack(side=tk.TOP, fill=tk.X, expand=True)
+        cute_x_scroll = ttk.Scrollbar(cute_row_wrap, orient=tk.HORIZONTAL, command=self.cute_canvas.xview)
+        cute_x_scroll.pack(side=tk.TOP, fill=tk.X)
+        self.cute_canvas.configure(xscrollcommand=cute_x_scroll.set)
+        self.cute_inner = ttk.Frame(self.cute_canvas)
+        self.cute_canvas_window = self.cute_canvas.create_window((0, 0), window=self.cute_inner, anchor='nw')
+        self.cute_inner.bind("<Configure>", self._on_cute_inner_configure)
+        self.cute_canvas.bind("<Configure>", self._on_cute_canvas_configure)
+
+        for i, (label, mode) in enumerate(CUTE_MODE_SHORTCUTS):
+            ttk.Button(self.cute_inner, text=label, command=lambda m=mode: self.set_cute_mode(m)).grid(row=0, column=i, padx=4, pady=4, sticky="w")
+
+        adv = ttk.LabelFrame(self.single_tab, text="Advanced options", padding=10)
+        adv.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Label(adv, text="NES Emphasis:").grid(row=0, column=0, sticky="e")
+        self.nes_r = tk.BooleanVar(value=False)
+        self.nes_g = tk.BooleanVar(value=False)
+        self.nes_b = tk.BooleanVar(value=False)
+        chk_r = ttk.Checkbutton(adv, text="Red", variable=self.nes_r, command=self.update_processing)
+        chk_g = ttk.Checkbutton(adv, text="Green", variable=self.nes_g, command=self.update_processing)
+        chk_b = ttk.Checkbutton(adv, text="Blue", variable=self.nes_b, command=self.update_processing)
+        chk_r.grid(row=0, column=1, sticky="w")
+        chk_g.grid(row=0, column=2, sticky="w")
+        chk_b.grid(row=0, column=3, sticky="w")
+        self.nes_controls_children = [chk_r, chk_g, chk_b]
+
+        self.genesis_vdp = tk.BooleanVar(value=False)
+        ttk.Checkbutton(adv, text="Genesis non-linear VDP levels", variable=self.genesis_vdp, command=self.update_processing).grid(row=0, column=4, padx=10, sticky="w")
+        self.ps1_movie = tk.BooleanVar(value=False)
+        ttk.Checkbutton(adv, text="PS1 24-bit Movie mode", variable=self.ps1_movie, command=self.update_processing).grid(row=0, column=5, padx=10, sticky="w")
+        ttk.Label(adv, text="N64 Texture Mode:").grid(row=0, column=6, sticky="e")
+        self.n64_mode = tk.StringVar(value="RGBA5551")
+        ttk.Combobox(adv, textvariable=self.n64_mode, values=["RGBA5551", "CI8", "CI4"], state="readonly", width=8).grid(row=0, column=7, padx=4, sticky="w")
+        self.n64_mode.trace_add('write', lambda *args: self.update_processing())
+        self.grid_space = tk.BooleanVar(value=False)
+        ttk.Checkbutton(adv, text="Quantize on pixel grid (faster)", variable=self.grid_space, command=self.update_processing).grid(row=0, column=8, padx=10, sticky="w")
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(adv, text="Show stage timings", variable=self.profile_var, command=self._toggle_profiling).grid(row=0, column=9, padx=10, sticky="w")
+
+        preview_frame = ttk.Frame(self.single_tab, padding=10)
+        preview_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.preview_outer = ttk.Frame(preview_frame)
+        self.preview_outer.pack(fill=tk.BOTH, expand=True)
+        self.preview_label = ttk.Label(self.preview_outer, text=self._empty_state_text(), anchor="center", justify="center")
+        self.preview_label.pack(fill=tk.BOTH, expand=True)
+        self.drop_hint = ttk.Label(self.preview_outer, text=self._drop_hint_text(), anchor="center", foreground="#666")
+        self.drop_hint.pack(side=tk.BOTTOM, pady=(0, 10))
+
+        compare_controls = ttk.Frame(self.compare_tab, padding=10)
+        compare_controls.pack(side=tk.TOP, fill=tk.X)
+        ttk.Button(compare_controls, text="Refresh Grid", command=self.refresh_compare).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(compare_controls, text="Save All…", command=self.save_all).pack(side=tk.LEFT)
+        self.compare_mode_label = ttk.Label(compare_controls, textvariable=self.cute_mode_var, foreground="#666")
+        ttk.Label(compare_controls, text="Cute mode:").pack(side=tk.LEFT, padx=(14, 4))
+        self.compare_mode_label.pack(side=tk.LEFT)
+
+        self.grid_canvas = tk.Canvas(self.compare_tab, highlightthickness=0)
+        self.grid_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.grid_scroll = ttk.Scrollbar(self.compare_tab, orient=tk.VERTICAL, command=self.grid_canvas.yview)
+        self.grid_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.grid_canvas.configure(yscrollcommand=self.grid_scroll.set)
+        self.grid_inner = ttk.Frame(self.grid_canvas)
+        self.grid_window = self.grid_canvas.create_window((0, 0), window=self.grid_inner, anchor='nw')
+        self.grid_inner.bind("<Configure>", lambda e: self.grid_canvas.configure(scrollregion=self.grid_canvas.bbox(self.grid_window)))
+        self.grid_canvas.bind('<Configure>', self._on_canvas_resize)
+
+        self._build_batch_tab()
+        self._update_palette_visibility()
+        self._init_drag_and_drop()
+
+    def _build_batch_tab(self):
+        controls = ttk.Frame(self.batch_tab, padding=10)
+        controls.pack(side=tk.TOP, fill=tk.X)
+        ttk.Button(controls, text="Add Files…", command=self.add_batch_files).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Label(controls, text="Output folder:").pack(side=tk.LEFT, padx=(6, 4))
+        self.batch_folder_var = tk.StringVar(value="")
+        ttk.Entry(controls, textvariable=self.batch_folder_var, width=40).pack(side=tk.LEFT, padx=(0, 4))
+        ttk.Button(controls, text="Choose…", command=self.choose_batch_folder).pack(side=tk.LEFT, padx=(0, 12))
+        ttk.Button(controls, text="Cancel Queue", command=self.batch_queue.cancel).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(controls, text="Clear Finished", command=self.clear_batch_finished).pack(side=tk.LEFT)
+
+        status = ttk.Frame(self.batch_tab, padding=(10, 0, 10, 6))
+        status.pack(side=tk.TOP, fill=tk.X)
+        self.batch_bar = ttk.Progressbar(status, maximum=1, length=240)
+        self.batch_bar.pack(side=tk.LEFT, padx=(0, 10))
+        self.batch_status = ttk.Label(status, text="Drop several images here, or use Add Files…", foreground="#666")
+        self.batch_status.pack(side=tk.LEFT)
+
+        table = ttk.Frame(self.batch_tab, padding=(10, 0, 10, 10))
+        table.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.batch_tree = ttk.Treeview(table, columns=("status", "output"), selectmode="extended")
+        self.batch_tree.heading("#0", text="File")
+        self.batch_tree.heading("status", text="Status")
+        self.batch_tree.heading("output", text="Output")
+        self.batch_tree.column("#0", width=260)
+        self.batch_tree.column("status", width=120, stretch=False)
+        self.batch_tree.column("output", width=420)
+        self.batch_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll = ttk.Scrollbar(table, orient=tk.VERTICAL, command=self.batch_tree.yview)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.batch_tree.configure(yscrollcommand=scroll.set)
+
+    def _on_cute_inner_configure(self, event=None):
+        self.cute_canvas.configure(scrollregion=self.cute_canvas.bbox("all"))
+
+    def _on_cute_canvas_configure(self, event):
+        self.cute_canvas.itemconfigure(self.cute_canvas_window, height=event.height)
+
+    def _empty_state_text(self):
+        if HAS_DND:
+            return "Drop an image here or click 'Load Image…'"
+        return "Click 'Load Image…' to open an image"
+
+    def _drop_hint_text(self):
+        return "You can drag a .png / .jpg / .bmp / .gif file onto the preview area." if HAS_DND else "Tip: install tkinterdnd2 for drag-and-drop."
+
+    def _init_drag_and_drop(self):
+        if not HAS_DND:
+            return
+        targets = [self.root, self.preview_label, self.preview_outer, self.grid_canvas, self.nb, self.batch_tree]
+        for widget in targets:
+            try:
+                widget.drop_target_register(DND_FILES)
+                widget.dnd_bind('<<Drop>>', self._on_drop)
+            except Exception:
+                pass
+
+    def _on_drop(self, event):
+        files = parse_dnd_files(getattr(event, 'data', ''))
+        if not files:
+            return
+        # several files (or a drop on the Batch tab) go to the batch queue
+        if len(files) > 1 or self.nb.select() == str(self.batch_tab):
+            self.enqueue_batch(files)
+            return
+        self.load_image(files[0])
+
+    def _on_canvas_resize(self, event):
+        self.grid_canvas.itemconfig(self.grid_window, width=event.width)
+
+    def _update_palette_visibility(self):
+        style_options = get_style(self.style_var.get()).options
+        is_custom = "custom_palette" in style_options
+        if is_custom:
+            if not self.palette_frame.winfo_ismapped():
+                self.palette_frame.grid()
+        else:
+            self.palette_frame.grid_remove()
+
+        nes_enabled = "nes_r" in style_options
+        for w in getattr(self, "nes_controls_children", []):
+            w.configure(state=("normal" if nes_enabled else "disabled"))
+
+    def set_cute_mode(self, cute_mode):
+        self.cute_mode_var.set(cute_mode)
+        self.update_processing()
+
+    def _on_palette_changed(self, *_):
+        self.current_palette_name = self.palette_var.get()
+        self.update_processing()
+
+    def on_slider(self, value):
+        val = int(float(value))
+        self.pixel_var.set(val)
+        if hasattr(self, 'pixel_label'):
+            self.pixel_label.configure(text=f"{val} px")
+        if self.preview_job is not None:
+            try:
+                self.root.after_cancel(self.preview_job)
+            except Exception:
+                pass
+        self.preview_job = self.root.after(90, self.update_processing)
+
+    def load_image(self, path=None):
+        if not path:
+            filetypes = [
+                ("Image files", ".png .jpg .jpeg .bmp .gif"),
+                ("PNG", ".png"), ("JPEG", ".jpg .jpeg"), ("Bitmap", ".bmp"), ("GIF", ".gif"), ("All files", "*.*"),
+            ]
+            path = filedialog.askopenfilename(title="Select an image", filetypes=filetypes)
+        if not path:
+            return
+        try:
+            # header only: previews decode at the size they need, the full decode waits for a save
+            img = SourceImage(path)
+            self.source_image = img
+            self.original_path = path
+            self.image_token += 1
+            self.update_processing()
+            self.refresh_compare()
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open image:\n{e}")
+
+    def _get_selected_custom_palette(self):
+        name = self.current_palette_name
+        return self.custom_palettes.get(name, [])
+
+    def _get_render_engine(self):
+        if self.render_engine is None:
+            self.render_engine = RenderEngine(cache=self.render_cache)
+        return self.render_engine
+
+    def _style_options(self, style):
+        custom_pal = self._get_selected_custom_palette() if "custom_palette" in get_style(style).options else None
+        return dict(
+            nes_r=self.nes_r.get(), nes_g=self.nes_g.get(), nes_b=self.nes_b.get(),
+            genesis_vdp=self.genesis_vdp.get(), ps1_movie=self.ps1_movie.get(),
+            n64_mode=self.n64_mode.get(), custom_palette=custom_pal,
+            grid_space=self.grid_space.get(), reuse_palette=True
+        )
+
+    def _current_job(self, source_img: SourceImage, out_path=None) -> RenderJob:
+        """Snapshot the current settings; Tk variables are only read here, on the UI thread."""
+        style = self.style_var.get()
+        pixel_size = int(self.pixel_var.get())
+        dither = self.dither_var.get()
+        return RenderJob(source_img, style, pixel_size, dither, self._style_options(style),
+                         self.cute_mode_var.get(), out_path)
+
+    def _toggle_profiling(self):
+        if self.profile_var.get():
+            retro_profile.enable()
+        else:
+            retro_profile.disable()
+            self.status_var.set("")
+        self.update_processing()
+
+    def update_processing(self):
+        if self.source_image is None:
+            return
+        job = self._current_job(self.source_image)
+        profiling = self.profile_var.get()
+        cache = self.render_cache
+        original = self.source_image
+        reference_side = min(MAX_PREVIEW_PROCESS_SIZE, max(original.size))
+        levels = [side for side in PREVIEW_LEVELS if side < reference_side] + [reference_side]
+        # coarse levels are blown up to roughly the size the final level will be shown at
+        box_scale = min(1.0, reference_side / float(max(PREVIEW_SIZE)))
+        coarse_box = (max(1, int(PREVIEW_SIZE[0] * box_scale)), max(1, int(PREVIEW_SIZE[1] * box_scale)))
+
+        def task(emit, cancelled):
+            # coarse levels first; pixel size scales with the level so the block count stays the same
+            # every stage is memoized, so a parameter change only recomputes the stages after it
+            # adaptive styles use one palette from the original for every level, and for the saved image
+            original_key = original.key
+            palette_job = resolve_palette(job, original)
+            for side in levels:
+                gap = None if side == reference_side else 3.0
+                with retro_profile.collect() as timings:
+                    source_key, source = cache.stage(original_key, "downscale", (side, gap),
+                                                     lambda: original.at_most(side, gap))
+                    if cancelled():
+                        return
+                    level_job = palette_job._replace(pixel_size=scaled_pixel_size(job.pixel_size, side, reference_side))
+                    out_key, out = cache.render_with_key(level_job, source, source_key)
+                    if cancelled():
+                        return
+                    box, upscale = (PREVIEW_SIZE, False) if side == reference_side else (coarse_box, True)
+                    _, preview = cache.stage(out_key, "fit", (box, upscale), lambda: fit_image_for_preview(out, box, upscale))
+                emit((preview, f"{side} px: {retro_profile.format_timings(timings)}" if profiling else None))
+
+        self.preview_worker.submit(task)
+        if self.preview_poll_job is None:
+            self.preview_poll_job = self.root.after(self.PREVIEW_POLL_MS, self._poll_preview)
+
+    def _poll_preview(self):
+        self.preview_poll_job = None
+        for kind, value in self.preview_worker.drain():
+            if kind == "error":
+                messagebox.showerror("Error", f"Processing failed:\n{value}")
+                continue
+            preview, timings = value
+            if timings is not None:
+                self.status_var.set(timings)
+            self.preview_photo = ImageTk.PhotoImage(preview)
+            self.preview_label.configure(image=self.preview_photo, text="")
+            self.drop_hint.configure(text=self._drop_hint_text())
+        if self.preview_worker.busy():
+            self.preview_poll_job = self.root.after(self.PREVIEW_POLL_MS, self._poll_preview)
+
+    def _build_compare_tiles(self):
+        for w in list(self.grid_inner.children.values()):
+            w.destroy()
+        self.compare_tiles = {}
+        cols = 2
+        for i, style in enumerate(STYLES):
+            frame = ttk.Frame(self.grid_inner, padding=6)
+            image_label = ttk.Label(frame, text="Rendering…", anchor="center")
+            image_label.pack()
+            ttk.Label(frame, text=style).pack()
+            frame.grid(row=i // cols, column=i % cols, sticky='nwe')
+            self.compare_tiles[style] = {"frame": frame, "image": image_label, "photo": None,
+                                         "inputs": None, "future": None}
+
+    def _visible_first(self, styles):
+        """Order styles so tiles currently inside the grid_canvas viewport come first."""
+        # tiles built in this call are not placed until Tk runs its idle tasks; before that they all read y=0
+        self.grid_canvas.update_idletasks()
+        top = self.grid_canvas.canvasy(0)
+        bottom = top + self.grid_canvas.winfo_height()
+
+        def offscreen(style):
+            frame = self.compare_tiles[style]["frame"]
+            y = frame.winfo_y()
+            return not (y < bottom and y + frame.winfo_height() > top)
+
+        return sorted(styles, key=offscreen)
+
+    def _compare_pool(self):
+        if self.compare_pool is None:
+            self.compare_pool = ThreadPoolExecutor(max_workers=default_worker_count(), thread_name_prefix="compare")
+        return self.compare_pool
+
+    def refresh_compare(self):
+        """Re-render the tiles whose inputs changed on a worker pool, visible tiles first."""
+        if self.source_image is None:
+            for tile in self.compare_tiles.values():
+                if tile["future"] is not None:
+                    tile["future"].cancel()
+            for w in list(self.grid_inner.children.values()):
+                w.destroy()
+            self.compare_tiles = {}
+            ttk.Label(self.grid_inner, text="Load an image to compare styles.").grid(row=0, column=0, padx=10, pady=10, sticky='w')
+            return
+        if not self.compare_tiles:
+            self._build_compare_tiles()
+
+        pixel_size = int(self.pixel_var.get())
+        dither = self.dither_var.get()
+        cute_mode = self.cute_mode_var.get()
+        original = self.source_image
+        cache = self.render_cache
+
+        def compare_source():
+            with self.compare_source_lock:
+                return cache.stage(original.key, "downscale", (1200, None), lambda: original.at_most(1200))
+
+        def render_tile(job):
+            job = resolve_palette(job, original)
+            source_key, source = compare_source()
+            out_key, out = cache.render_with_key(job, source, source_key)
+            return cache.stage(out_key, "fit", (GRID_THUMB_SIZE, False),
+                               lambda: fit_image_for_preview(out, GRID_THUMB_SIZE))[1]
+
+        stale = []
+        for style in STYLES:
+            tile = self.compare_tiles[style]
+            job = RenderJob(None, style, pixel_size, dither, self._style_options(style), cute_mode)
+            inputs = (self.image_token, repr(cache.job_stages(job)))
+            if inputs == tile["inputs"]:
+                continue  # already shown, or still rendering for these exact inputs
+            if tile["future"] is not None:
+                tile["future"].cancel()
+            tile["inputs"] = inputs
+            tile["future"] = None
+            tile["photo"] = None
+            if "custom_palette" in get_style(style).options and not self._get_selected_custom_palette():
+                tile["image"].configure(image="", text="(No colors in selected palette)")
+                continue
+            tile["image"].configure(image="", text="Rendering…")
+            stale.append((style, job, inputs))
+
+        order = self._visible_first([style for style, _, _ in stale])
+        stale.sort(key=lambda item: order.index(item[0]))
+        for style, job, inputs in stale:
+            future = self._compare_pool().submit(render_tile, job)
+            self.compare_tiles[style]["future"] = future
+            future.add_done_callback(lambda f, style=style, inputs=inputs: self.compare_events.put((style, inputs, f)))
+        if stale and self.compare_poll_job is None:
+            self.compare_poll_job = self.root.after(self.PREVIEW_POLL_MS, self._poll_compare)
+
+    def _poll_compare(self):
+        self.compare_poll_job = None
+        while True:
+            try:
+                style, inputs, future = self.compare_events.get_nowait()
+            except queue.Empty:
+                break
+            tile = self.compare_tiles.get(style)
+            if tile is None or tile["inputs"] != inputs or future.cancelled():
+                continue
+            tile["future"] = None
+            try:
+                thumb = future.result()
+            except Exception as e:
+                tile["inputs"] = None  # retry on the next refresh
+                tile["image"].configure(image="", text=f"{style}: error {e}")
+                continue
+            tile["photo"] = ImageTk.PhotoImage(thumb)
+            tile["image"].configure(image=tile["photo"], text="")
+        if any(tile["future"] is not None for tile in self.compare_tiles.values()):
+            self.compare_poll_job = self.root.after(self.PREVIEW_POLL_MS, self._poll_compare)
+
+    def save_image(self):
+        if self.source_image is None:
+            messagebox.showinfo("Save", "Please load an image first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Save pixel art",
+            defaultextension=".png",
+            filetypes=[("PNG", ".png"), ("JPEG", ".jpg .jpeg"), ("BMP", ".bmp"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+
+        def finished(results):
+            result = results[0]
+            if result is None:
+                return
+            if result.error is not None:
+                messagebox.showerror("Error", f"Could not save image:\n{result.error}")
+            else:
+                messagebox.showinfo("Saved", f"Pixel art saved to:\n{path}")
+
+        # The full-resolution decode and render only happen here, off the Tk thread.
+        job = self._current_job(self.source_image, out_path=path)
+        RenderProgressDialog(self.root, "Save", self._get_render_engine(), [job], finished)
+
+    def save_all(self):
+        if self.source_image is None:
+            messagebox.showinfo("Save All", "Please load an image first.")
+            return
+        folder = filedialog.askdirectory(title="Select folder to save all styles")
+        if not folder:
+            return
+        pixel_size = int(self.pixel_var.get())
+        dither = self.dither_var.get()
+        cute_mode = self.cute_mode_var.get()
+        jobs = [
+            RenderJob(self.source_image, style, pixel_size, dither, self._style_options(style), cute_mode,
+                      os.path.join(folder, f"pixel_{style_file_stem(style, cute_mode)}.png"))
+            for style in STYLES
+        ]
+
+        def finished(results):
+            count = 0
+            errors = []
+            for job, result in zip(jobs, results):
+                if result is None:
+                    continue
+                if result.error is not None:
+                    errors.append(f"{job.style}: {result.error}")
+                else:
+                    count += 1
+            msg = f"Saved {count} images to\n{folder}"
+            if any(result is None for result in results):
+                msg += f"\n\nCancelled, {len(jobs) - count - len(errors)} styles skipped."
+            if errors:
+                msg += "\n\nErrors:\n" + "\n".join(errors)
+            messagebox.showinfo("Save All", msg)
+
+        RenderProgressDialog(self.root, "Save All", self._get_render_engine(), jobs, finished)
+
+    # ---- batch queue ----
+
+    def choose_batch_folder(self):
+        folder = filedialog.askdirectory(title="Select folder for batch output")
+        if folder:
+            self.batch_folder_var.set(folder)
+        return folder
+
+    def add_batch_files(self):
+        paths = filedialog.askopenfilenames(title="Select images to convert",
+                                            filetypes=[("Image files", " ".join(IMAGE_EXTENSIONS)), ("All files", "*.*")])
+        if paths:
+            self.enqueue_batch(list(paths))
+
+    def enqueue_batch(self, paths):
+        """Queue paths for rendering with the current settings; outputs go to the batch folder."""
+        paths = [p for p in paths if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS]
+        if not paths:
+            messagebox.showinfo("Batch", "None of the dropped files is a supported image.")
+            return
+        folder = self.batch_folder_var.get() or self.choose_batch_folder()
+        if not folder:
+            return
+        style = self.style_var.get()
+        if "custom_palette" in get_style(style).options and not self._get_selected_custom_palette():
+            messagebox.showerror("Batch", "The selected custom palette has no colors.")
+            return
+        os.makedirs(folder, exist_ok=True)
+        cute_mode = self.cute_mode_var.get()
+        suffix = style_file_stem(style, cute_mode)
+        taken = self.batch_names.setdefault((os.path.normcase(os.path.abspath(folder)), suffix), {})
+        jobs = []
+        for path, _, stem in output_stems(((p, "") for p in paths), taken):
+            jobs.append(self._current_job(path, os.path.join(folder, f"{stem}__{suffix}.png")))
+        self._get_render_engine()  # created here, on the UI thread, before the queue's worker asks for it
+        self.batch_queue.add(jobs)
+        self.nb.select(self.batch_tab)
+        if self.batch_poll_job is None:
+            self.batch_poll_job = self.root.after(self.PREVIEW_POLL_MS, self._poll_batch)
+
+    def clear_batch_finished(self):
+        for job_id, row in list(self.batch_rows.items()):
+            if self.batch_tree.set(row, "status") in ("Done", "Failed", "Cancelled"):
+                self.batch_tree.delete(row)
+                del self.batch_rows[job_id]
+
+    def _poll_batch(self):
+        self.batch_poll_job = None
+        labels = {"rendering": "Rendering…", "done": "Done", "error": "Failed", "cancelled": "Cancelled"}
+        for kind, job_id, value in self.batch_queue.drain():
+            if kind == "queued":
+                self.batch_rows[job_id] = self.batch_tree.insert("", tk.END, text=os.path.basename(value.source),
+                                                                 values=("Queued", value.out_path))
+                continue
+            row = self.batch_rows.get(job_id)
+            if row is None:
+                continue
+            self.batch_tree.set(row, "status", labels[kind])
+            if kind == "error":
+                self.batch_tree.set(row, "output", str(value))
+            elif kind == "rendering":
+                self.batch_tree.see(row)
+        stats = self.batch_queue.stats()
+        finished = stats["done"] + stats["failed"]
+        total = finished + stats["rendering"] + stats["queued"]
+        self.batch_bar.configure(maximum=max(1, total), value=finished)
+        text = f"{finished} / {total} done · {stats['per_second']:.1f} files/s"
+        if stats["failed"]:
+            text += f" · {stats['failed']} failed"
+        self.batch_status.configure(text=text)
+        if self.batch_queue.busy():
+            self.batch_poll_job = self.root.after(self.PREVIEW_POLL_MS, self._poll_batch)
+
+    def open_palette_editor(self):
+        def on_commit(name):
+            self.current_palette_name = name
+            self.palette_var.set(name)
+            self.palette_cb.configure(values=list(self.custom_palettes.keys()))
+            self.update_processing()
+            self.refresh_compare()
+
+        editor = PaletteEditor(self.root, self.custom_palettes, self.current_palette_name, on_commit)
+
+        def on_destroy(event):
+            # palettes may have been added or removed without "Use This Palette"
+            if event.widget is editor:
+                self.palette_cb.configure(values=list(self.custom_palettes.keys()))
+        editor.bind("<Destroy>", on_destroy, add="+")
+
+
+class RenderProgressDialog(tk.Toplevel):
+    """Runs RenderJobs on the engine from a background thread and shows progress with a Cancel button."""
+
+    POLL_MS = 50
+
+    def __init__(self, parent, title, engine: RenderEngine, jobs, on_done):
+        super().__init__(parent)
+        self.title(title)
+        self.resizable(False, False)
+        self.transient(parent)
+        self.on_done = on_done
+        self.total = len(jobs)
+        self.cancel_event = threading.Event()
+        self.events = queue.Queue()
+
+        body = ttk.Frame(self, padding=12)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.status = ttk.Label(body, text=f"Rendering 0 / {self.total}…", width=40)
+        self.status.pack(anchor="w")
+        self.bar = ttk.Progressbar(body, maximum=max(1, self.total), length=320)
+        self.bar.pack(fill=tk.X, pady=8)
+        self.cancel_btn = ttk.Button(body, text="Cancel", command=self._cancel)
+        self.cancel_btn.pack(anchor="e")
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+
+        def work():
+            try:
+                results = engine.run(jobs, progress=lambda done, total, i, r: self.events.put(("progress", done)),
+                                     cancel_event=self.cancel_event)
+            except Exception as e:
+                results = [None] * len(jobs)
+                self.events.put(("error", e))
+            self.events.put(("done", results))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.after(self.POLL_MS, self._poll)
+
+    def _cancel(self):
+        self.cancel_event.set()
+        self.cancel_btn.configure(state="disabled")
+        self.status.configure(text="Cancelling…")
+
+    def _poll(self):
+        try:
+            while True:
+                kind, value = self.events.get_nowait()
+                if kind == "progress":
+                    self.bar.configure(value=value)
+                    if not self.cancel_event.is_set():
+                        self.status.configure(text=f"Rendering {value} / {self.total}…")
+                elif kind == "error":
+                    messagebox.showerror("Error", f"Rendering failed:\n{value}", parent=self)
+                elif kind == "done":
+                    self.destroy()
+                    self.on_done(value)
+                    return
+        except queue.Empty:
+            pass
+        self.after(self.POLL_MS, self._poll)
+
+
+# -------------------- app entry --------------------
+def main():
+    if HAS_DND:
+        root = TkinterDnD.Tk()
+    else:
+        root = tk.Tk()
+    try:
+        style = ttk.Style()
+        if "clam" in style.theme_names():
+            style.theme_use("clam")
+    except Exception:
+        pass
+    app = PixelArtApp(root)
+    root.geometry("1120x860")
+    root.minsize(860, 640)
+    try:
+        root.mainloop()
+    finally:
+        try:
+            app.custom_palettes.flush()
+        except OSError as e:
+            print(f"Could not save palettes: {e}", file=sys.stderr)
+        app.batch_queue.cancel()
+        if app.render_engine is not None:
+            app.render_engine.shutdown()
+        if app.compare_pool is not None:
+            app.compare_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,220 @@
+# Persistent palette library: every palette is a .gpl file in one folder, listed in an index that is all
+# startup reads. Colors are parsed the first time a palette is used.
+# scan_palettes() parses a whole folder tree of palette files for a bulk import.
+import os
+import re
+import json
+import struct
+import threading
+from collections import namedtuple
+from collections.abc import MutableMapping
+
+from retro_core import load_gpl, save_gpl, load_palette_file, palette_digest, PALETTE_EXTENSIONS
+
+LIBRARY_DIR = os.environ.get("RETRO_PALETTE_DIR") or os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "RetroImageMaker", "palettes")
+INDEX_FILE = "library.json"
+INDEX_VERSION = 1
+
+
+# error is set (and colors None) for a file that could not be parsed
+ScannedPalette = namedtuple("ScannedPalette", "path name colors digest error")
+
+
+def iter_palette_files(root: str, recursive=True):
+    """Paths of the palette files (PALETTE_EXTENSIONS) under root, in sorted order, one folder at a time."""
+    for folder, dirs, files in os.walk(root):
+        if recursive:
+            dirs.sort()
+        else:
+            dirs.clear()
+        for f in sorted(files):
+            if os.path.splitext(f)[1].lower() in PALETTE_EXTENSIONS:
+                yield os.path.join(folder, f)
+
+
+def scan_palettes(root: str, recursive=True, cancelled=None):
+    """Yield a ScannedPalette per palette file under root, parsed lazily; stops early once cancelled() is true."""
+    for path in iter_palette_files(root, recursive):
+        if cancelled is not None and cancelled():
+            return
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            colors = load_palette_file(path)
+        except (OSError, ValueError, struct.error) as e:
+            yield ScannedPalette(path, name, None, None, str(e) or type(e).__name__)
+            continue
+        yield ScannedPalette(path, name, colors, palette_digest(colors), None)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")[:48] or "palette"
+
+
+def _write_atomic(path: str, write):
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class PaletteLibrary(MutableMapping):
+    """Palettes by name (lists of RGB tuples) stored in folder; behaves like the in-memory dict it replaces.
+
+    Edits, including in-place changes to a palette's list, stay in memory until flush(). An empty library
+    starts out with defaults (written on the first flush).
+    """
+
+    def __init__(self, folder=LIBRARY_DIR, defaults=None):
+        self.folder = folder
+        self._entries = {}  # name -> {"file": .gpl name or None, "digest": of the saved colors or None}
+        self._colors = {}  # name -> list, for palettes loaded or assigned this session
+        self._removed = []  # files of deleted palettes, removed on flush
+        self._lock = threading.RLock()
+        self._read_index()
+        if not self._entries:
+            for name, colors in (defaults or {}).items():
+                self[name] = list(colors)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.folder, filename)
+
+    def _read_index(self):
+        try:
+            with open(self._path(INDEX_FILE), encoding="utf-8") as fp:
+                data = json.load(fp)
+            if data.get("version") != INDEX_VERSION:
+                raise ValueError("unknown library version")
+            entries = {e["name"]: {"file": e["file"], "digest": e["digest"]} for e in data["palettes"]}
+        except (OSError, ValueError, KeyError, TypeError):
+            entries = self._scan()
+        self._entries = {name: e for name, e in entries.items() if os.path.exists(self._path(e["file"]))}
+
+    def _scan(self) -> dict:
+        """Index rebuilt from the .gpl files alone (no readable index); digests are filled in lazily."""
+        try:
+            files = sorted(f for f in os.listdir(self.folder) if f.lower().endswith(".gpl"))
+        except OSError:
+            return {}
+        return {os.path.splitext(f)[0]: {"file": f, "digest": None} for f in files}
+
+    def _write_index(self):
+        data = {"version": INDEX_VERSION,
+                "palettes": [{"name": name, "file": e["file"], "digest": e["digest"]}
+                             for name, e in self._entries.items() if e["file"] is not None]}
+
+        def write(path):
+            with open(path, "w", encoding="utf-8") as fp:
+                json.dump(data, fp, indent=1)
+        _write_atomic(self._path(INDEX_FILE), write)
+
+    def __getitem__(self, name: str):
+        with self._lock:
+            if name in self._colors:
+                return self._colors[name]
+            entry = self._entries[name]
+            try:
+                colors = load_gpl(self._path(entry["file"]))
+            except ValueError:
+                colors = []  # saved while empty
+            except OSError:
+                raise KeyError(name) from None
+            if entry["digest"] is None:
+                entry["digest"] = palette_digest(colors)
+            self._colors[name] = colors
+            return colors
+
+    def __setitem__(self, name: str, colors):
+        with self._lock:
+            self._entries.setdefault(name, {"file": None, "digest": None})
+            # keep the caller's list, which the palette editor goes on changing in place
+            self._colors[name] = colors if isinstance(colors, list) else list(colors)
+
+    def __delitem__(self, name: str):
+        with self._lock:
+            entry = self._entries.pop(name)
+            self._colors.pop(name, None)
+            if entry["file"] is not None:
+                self._removed.append(entry["file"])
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _unique_file(self, name: str) -> str:
+        taken = {e["file"] for e in self._entries.values()} | set(self._removed)
+        base = _slug(name)
+        filename, n = f"{base}.gpl", 1
+        while filename in taken or os.path.exists(self._path(filename)):
+            n += 1
+            filename = f"{base}_{n}.gpl"
+        return filename
+
+    def _digest(self, name: str) -> str:
+        if name in self._colors:
+            return palette_digest(self._colors[name])
+        if self._entries[name]["digest"] is None:
+            self[name]  # reading a palette fills in its digest
+        return self._entries[name]["digest"]
+
+    def unique_name(self, base: str) -> str:
+        name, n = base, 1
+        while name in self._entries:
+            n += 1
+            name = f"{base} ({n})"
+        return name
+
+    def add_palettes(self, scanned):
+        """Add ScannedPalettes in one pass; returns (names added, duplicates skipped, [(path, error)] failed).
+
+        A palette whose colors the library (or an earlier one of scanned) already holds is skipped, whatever
+        its name.
+        """
+        added, duplicates, failed = [], 0, []
+        with self._lock:
+            known = set()
+            for name in list(self._entries):
+                try:
+                    known.add(self._digest(name))
+                except KeyError:
+                    pass
+            for item in scanned:
+                if item.error is not None:
+                    failed.append((item.path, item.error))
+                elif item.digest in known:
+                    duplicates += 1
+                else:
+                    known.add(item.digest)
+                    name = self.unique_name(item.name)
+                    self[name] = item.colors
+                    added.append(name)
+        return added, duplicates, failed
+
+    def flush(self):
+        """Write every new or changed palette and the index; raises OSError if the folder is not writable."""
+        with self._lock:
+            os.makedirs(self.folder, exist_ok=True)
+            for filename in self._removed:
+                try:
+                    os.remove(self._path(filename))
+                except FileNotFoundError:
+                    pass
+            self._removed = []
+            for name, colors in self._colors.items():
+                entry = self._entries[name]
+                digest = palette_digest(colors)
+                if entry["file"] is not None and digest == entry["digest"]:
+                    continue
+                entry["file"] = entry["file"] or self._unique_file(name)
+                _write_atomic(self._path(entry["file"]), lambda path: save_gpl(path, colors, name=name))
+                entry["digest"] = digest
+            self._write_index()
@@ -0,0 +1,206 @@
+# Optional per-stage instrumentation of the render pipeline. Off by default, when an instrumented function
+# costs one flag check. enable() collects wall time per stage (and, with allocations=True, the peak of the
+# memory tracemalloc sees: Python and NumPy, not Pillow's image buffers); hooks get every finished stage.
+import json
+import time
+import logging
+import threading
+import functools
+import tracemalloc
+from collections import namedtuple
+
+StageTiming = namedtuple("StageTiming", "name seconds alloc_bytes depth")
+
+ENABLED = False
+_allocations = False
+_started_tracemalloc = False
+_lock = threading.Lock()
+_stats = {}  # name -> [calls, total seconds, max seconds, max alloc bytes]
+_hooks = []
+_local = threading.local()
+
+
+def enable(allocations=False):
+    """Start collecting; allocations=True also tracks traced memory per stage (slower)."""
+    global ENABLED, _allocations, _started_tracemalloc
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    _allocations = allocations
+    ENABLED = True
+
+
+def disable():
+    global ENABLED, _allocations, _started_tracemalloc
+    ENABLED = False
+    _allocations = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def add_hook(fn):
+    """Call fn(StageTiming) after every stage, on the thread that ran it."""
+    with _lock:
+        _hooks.append(fn)
+
+
+def remove_hook(fn):
+    with _lock:
+        if fn in _hooks:
+            _hooks.remove(fn)
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+        _local.collectors = []
+    return stack
+
+
+class _Stage:
+    __slots__ = ("name", "start", "alloc_start", "alloc_peak")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = _stack()
+        if _allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].alloc_peak = max(stack[-1].alloc_peak, peak)
+            tracemalloc.reset_peak()
+            self.alloc_start = self.alloc_peak = current
+        else:
+            self.alloc_start = None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        alloc = None
+        if self.alloc_start is not None and tracemalloc.is_tracing():
+            self.alloc_peak = max(self.alloc_peak, tracemalloc.get_traced_memory()[1])
+            alloc = self.alloc_peak - self.alloc_start
+            if stack:
+                stack[-1].alloc_peak = max(stack[-1].alloc_peak, self.alloc_peak)
+        timing = StageTiming(self.name, seconds, alloc, len(stack))
+        with _lock:
+            entry = _stats.setdefault(self.name, [0, 0.0, 0.0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] = max(entry[3], alloc or 0)
+            hooks = list(_hooks)
+        for collector in _local.collectors:
+            collector.append(timing)
+        for hook in hooks:
+            hook(timing)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """Context manager timing the enclosed block as stage name (a shared no-op while disabled)."""
+    return _Stage(name) if ENABLED else _NO_STAGE
+
+
+def profiled(name=None):
+    """Decorator timing every call of the function as one stage, named after it by default."""
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Stage(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class collect:
+    """Gather the StageTimings finished on this thread while the with-block runs:
+
+        with retro_profile.collect() as timings:
+            render(...)
+    """
+
+    def __enter__(self):
+        _stack()
+        self.timings = []
+        _local.collectors.append(self.timings)
+        return self.timings
+
+    def __exit__(self, *exc):
+        _local.collectors.remove(self.timings)
+        return False
+
+
+def snapshot() -> dict:
+    """Totals per stage since the last reset(), slowest first."""
+    with _lock:
+        items = sorted(_stats.items(), key=lambda kv: -kv[1][1])
+    return {name: {"calls": calls, "total_ms": total * 1000, "mean_ms": total * 1000 / calls,
+                   "max_ms": worst * 1000, "alloc_peak_kb": alloc / 1024 if alloc else None}
+            for name, (calls, total, worst, alloc) in items}
+
+
+def dump_json(fp_or_path):
+    data = json.dumps(snapshot(), indent=1)
+    if hasattr(fp_or_path, "write"):
+        fp_or_path.write(data + "\n")
+    else:
+        with open(fp_or_path, "w") as fp:
+            fp.write(data + "\n")
+
+
+def log_hook(logger=None, level=logging.INFO):
+    """A hook that logs every stage as one JSON object, for add_hook()."""
+    logger = logger or logging.getLogger("retro.profile")
+
+    def hook(timing: StageTiming):
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({"stage": timing.name, "ms": round(timing.seconds * 1000, 3),
+                                          "alloc_kb": None if timing.alloc_bytes is None else timing.alloc_bytes // 1024,
+                                          "depth": timing.depth}))
+    return hook
+
+
+def format_timings(timings, limit=5) -> str:
+    """One-line summary of collected StageTimings (time summed per stage, slowest first)."""
+    totals = {}
+    for t in timings:
+        seconds, alloc = totals.get(t.name, (0.0, None))
+        if t.alloc_bytes is not None:
+            alloc = max(alloc or 0, t.alloc_bytes)
+        totals[t.name] = (seconds + t.seconds, alloc)
+    if not totals:
+        return "all stages cached"
+    parts = []
+    for name, (seconds, alloc) in sorted(totals.items(), key=lambda kv: -kv[1][0])[:limit]:
+        parts.append(f"{name} {seconds * 1000:.1f} ms" + (f" (+{alloc / 2**20:.1f} MB)" if alloc else ""))
+    return " · ".join(parts)
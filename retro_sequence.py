@@ -0,0 +1,206 @@
+# Frame-sequence rendering: numbered image folders, or video decoded and encoded through a local ffmpeg.
+# Frames are read lazily, rendered in order on a bounded number of workers, and the adaptive styles keep
+# their palette from frame to frame until the scene changes.
+import os
+import re
+import glob
+import time
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+from retro_core import ADAPTIVE_STYLES, IMAGE_EXTENSIONS
+from retro_engine import RenderEngine, RenderJob
+from retro_anim import shared_palette
+
+VIDEO_EXTENSIONS = (".mp4", ".m4v", ".mov", ".mkv", ".webm", ".avi")
+DEFAULT_FPS = 24.0
+# scene distance (0 = same colors, 1 = nothing in common) above which a new palette is picked
+SCENE_THRESHOLD = 0.25
+SIGNATURE_SIZE = (64, 64)
+SIGNATURE_BITS = 4
+
+
+def _natural_key(path: str):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", os.path.basename(path))]
+
+
+def iter_image_sequence(source: str):
+    """Yield the RGB frames of a folder or glob of numbered images, in natural order (frame2 before frame10)."""
+    paths = [os.path.join(source, f) for f in os.listdir(source)] if os.path.isdir(source) else glob.glob(source)
+    paths = sorted((p for p in paths if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS), key=_natural_key)
+    for path in paths:
+        with Image.open(path) as im:
+            yield im.convert('RGB')
+
+
+def probe_video(path: str, ffprobe="ffprobe"):
+    """(width, height, fps) of the first video stream."""
+    out = subprocess.run([ffprobe, "-v", "error", "-select_streams", "v:0",
+                          "-show_entries", "stream=width,height,r_frame_rate",
+                          "-of", "default=noprint_wrappers=1", path],
+                         capture_output=True, text=True, check=True).stdout
+    info = dict(line.split("=", 1) for line in out.splitlines() if "=" in line)
+    num, _, den = info.get("r_frame_rate", "").partition("/")
+    try:
+        fps = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        fps = DEFAULT_FPS
+    return int(info["width"]), int(info["height"]), fps
+
+
+def iter_video_frames(path: str, size, ffmpeg="ffmpeg"):
+    """Yield the frames of a video as RGB images, decoded by ffmpeg into a raw pipe."""
+    w, h = size
+    frame_bytes = w * h * 3
+    proc = subprocess.Popen([ffmpeg, "-v", "error", "-i", path, "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+                            stdout=subprocess.PIPE)
+    try:
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield Image.frombytes('RGB', (w, h), data)
+    finally:
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+
+
+class FolderSink:
+    """Writes frames as numbered PNGs."""
+
+    def __init__(self, folder: str, prefix="frame_"):
+        self.folder = folder
+        self.prefix = prefix
+        os.makedirs(folder, exist_ok=True)
+
+    def write(self, index: int, img: Image.Image):
+        img.save(os.path.join(self.folder, f"{self.prefix}{index:06d}.png"))
+
+    def close(self):
+        pass
+
+
+class VideoSink:
+    """Pipes raw frames into ffmpeg, started on the first frame once the size is known."""
+
+    def __init__(self, path: str, fps=DEFAULT_FPS, ffmpeg="ffmpeg"):
+        self.path = path
+        self.fps = fps
+        self.ffmpeg = ffmpeg
+        self.proc = None
+
+    def write(self, index: int, img: Image.Image):
+        if self.proc is None:
+            w, h = img.size
+            # yuv420p (what players expect) needs even dimensions
+            self.proc = subprocess.Popen([self.ffmpeg, "-y", "-v", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                                          "-s", f"{w}x{h}", "-r", f"{self.fps:g}", "-i", "-",
+                                          "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", self.path],
+                                         stdin=subprocess.PIPE)
+        try:
+            self.proc.stdin.write(img.convert('RGB').tobytes())
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg exited with status {self.proc.wait()} while writing {self.path}") from None
+
+    def close(self):
+        if self.proc is not None:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass  # ffmpeg already exited; wait() reports how
+            if self.proc.wait():
+                raise RuntimeError(f"ffmpeg failed to write {self.path}")
+
+
+def frame_signature(img: Image.Image) -> np.ndarray:
+    """Normalized color histogram (SIGNATURE_BITS per channel) of a small thumbnail."""
+    small = np.asarray(img.convert('RGB').resize(SIGNATURE_SIZE, resample=Image.BILINEAR))
+    q = (small >> (8 - SIGNATURE_BITS)).astype(np.int32).reshape(-1, 3)
+    bins = (q[:, 0] << (2 * SIGNATURE_BITS)) | (q[:, 1] << SIGNATURE_BITS) | q[:, 2]
+    hist = np.bincount(bins, minlength=1 << (3 * SIGNATURE_BITS)).astype(np.float64)
+    return hist / hist.sum()
+
+
+def scene_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """Share of the color distribution that differs between two signatures, 0..1."""
+    return 0.5 * float(np.abs(a - b).sum())
+
+
+class TemporalPalette:
+    """Adaptive palette carried across frames until the scene's colors change past threshold."""
+
+    def __init__(self, style: str, pixel_size: int, options=None, threshold=SCENE_THRESHOLD):
+        self.style = style
+        self.pixel_size = pixel_size
+        self.options = options
+        self.threshold = threshold
+        self.palette = None
+        self.signature = None
+        self.changes = 0
+
+    def palette_for(self, frame: Image.Image):
+        if self.style not in ADAPTIVE_STYLES:
+            return None
+        sig = frame_signature(frame)
+        if self.signature is None or scene_distance(sig, self.signature) > self.threshold:
+            self.palette = shared_palette([frame], self.style, self.pixel_size, self.options)
+            self.signature = sig
+            self.changes += 1
+        return self.palette
+
+
+def render_sequence(frames, sink, style: str, pixel_size: int, dither, options=None, cute_mode="None",
+                    engine=None, max_pending=None, scene_threshold=SCENE_THRESHOLD, report=None, report_every=0.5):
+    """Render an iterable of frames in order into sink.write(index, image); returns the final stats.
+
+    At most max_pending frames (default two per worker) are decoded and in flight at once. scene_threshold
+    None gives every frame its own palette. report(stats) is called about every report_every seconds with
+    frames done, fps, queue depth and how many palettes were picked.
+    """
+    options = dict(options or {})
+    tracker = TemporalPalette(style, pixel_size, options, scene_threshold) if scene_threshold is not None else None
+    own_engine = engine is None
+    engine = engine or RenderEngine()
+    max_pending = max_pending or 2 * engine.max_workers
+    stats = {"frames": 0, "fps": 0.0, "queue": 0, "max_queue": max_pending, "palettes": 0, "seconds": 0.0}
+    submitted = [0]
+
+    def jobs():
+        for frame in frames:
+            frame_options = options
+            if tracker is not None:
+                frame_options = dict(options, adaptive_palette=tracker.palette_for(frame))
+            submitted[0] += 1
+            yield RenderJob(frame, style, pixel_size, dither, frame_options, cute_mode)
+
+    started = last_report = time.perf_counter()
+    failed = True
+    try:
+        for index, result in enumerate(engine.imap(jobs(), max_pending)):
+            if result.error is not None:
+                raise result.error
+            sink.write(index, result.image)
+            now = time.perf_counter()
+            stats.update(frames=index + 1, queue=submitted[0] - index - 1, seconds=now - started,
+                         fps=(index + 1) / max(now - started, 1e-9),
+                         palettes=tracker.changes if tracker is not None else index + 1)
+            if report is not None and now - last_report >= report_every:
+                last_report = now
+                report(dict(stats))
+        failed = False
+    finally:
+        if own_engine:
+            engine.shutdown()
+        # always close, so ffmpeg is reaped; after a failed frame its own error is the one to report
+        try:
+            sink.close()
+        except Exception:
+            if not failed:
+                raise
+    if report is not None:
+        report(dict(stats))
+    return stats
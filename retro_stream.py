@@ -0,0 +1,221 @@
+# Strip-by-strip rendering for images too large to decode in one piece (20k x 20k scans and up).
+# Only the grid-aligned part of the pipeline streams: the BILINEAR pixel grid, the point operations and
+# fixed-palette quantization, undithered or with a Bayer dither. Output is byte-identical to apply_style.
+import os
+import zlib
+import struct
+
+import numpy as np
+from PIL import Image
+
+from retro_core import BAYER_SIZES, STYLE_REGISTRY, reduce_colors, dither_mode
+
+# styles whose reduce_colors step treats every pixel on its own
+STREAMABLE_STYLES = tuple(name for name, style in STYLE_REGISTRY.items() if style.per_pixel)
+# input pixels per strip; peak memory is a small multiple of this times 3 bytes, whatever the image size
+STREAM_STRIP_PIXELS = 4 * 1024 * 1024
+
+# Pillow raw modes we can slice straight out of the file: bytes per pixel and the R, G, B byte offsets
+RAW_LAYOUTS = {
+    "RGB": (3, (0, 1, 2)),
+    "BGR": (3, (2, 1, 0)),
+    "RGBX": (4, (0, 1, 2)),
+    "RGBA": (4, (0, 1, 2)),
+    "BGRX": (4, (2, 1, 0)),
+    "BGRA": (4, (2, 1, 0)),
+    "L": (1, (0, 0, 0)),
+}
+
+# fixed-point precision of Pillow's 8-bit resampler (Resample.c)
+_PRECISION_BITS = 32 - 8 - 2
+
+
+class RawStripReader:
+    """Row access to uncompressed rasters (BMP, PPM/PGM, uncompressed TIFF) read directly from the file."""
+
+    def __init__(self, path: str):
+        # only the header is parsed, so Pillow's decompression-bomb limit does not apply here
+        limit, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+        try:
+            with Image.open(path) as im:
+                self.size = im.size
+                tiles = list(im.tile)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+        w, h = self.size
+        self.tiles = []
+        for codec, extents, offset, args in tiles:
+            rawmode, stride, orientation = (args, 0, 1) if isinstance(args, str) else (tuple(args) + (0, 1))[:3]
+            x0, y0, x1, y1 = extents
+            if codec != "raw" or rawmode not in RAW_LAYOUTS or (x0, x1) != (0, w):
+                raise ValueError(f"{os.path.basename(path)}: streaming needs an uncompressed RGB or grayscale "
+                                 "BMP, PPM/PGM or TIFF")
+            bpp = RAW_LAYOUTS[rawmode][0]
+            self.tiles.append((y0, y1, offset, rawmode, stride or w * bpp, orientation))
+        self.tiles.sort()
+        if sum(t[1] - t[0] for t in self.tiles) != h:
+            raise ValueError(f"{os.path.basename(path)}: unsupported strip layout")
+        self.fp = open(path, "rb")
+
+    def read(self, y0: int, y1: int) -> np.ndarray:
+        """Rows y0..y1 as an (rows, width, 3) uint8 array."""
+        w = self.size[0]
+        parts = []
+        for t0, t1, offset, rawmode, stride, orientation in self.tiles:
+            a, b = max(y0, t0), min(y1, t1)
+            if a >= b:
+                continue
+            # bottom-up tiles (BMP) store the last row first
+            first = (t1 - b) if orientation < 0 else (a - t0)
+            self.fp.seek(offset + first * stride)
+            raw = np.frombuffer(self.fp.read((b - a) * stride), dtype=np.uint8).reshape(b - a, stride)
+            if orientation < 0:
+                raw = raw[::-1]
+            bpp, order = RAW_LAYOUTS[rawmode]
+            pixels = raw[:, :w * bpp].reshape(b - a, w, bpp)
+            parts.append(pixels[:, :, order] if order != (0, 1, 2) or bpp != 3 else pixels)
+        return np.ascontiguousarray(np.concatenate(parts) if len(parts) > 1 else parts[0])
+
+    def close(self):
+        self.fp.close()
+
+
+class PNGStripWriter:
+    """Writes 8-bit RGB rows to a PNG as they arrive: one zlib stream, emitted as IDAT chunks."""
+
+    CHUNK_BYTES = 1 << 20
+
+    def __init__(self, path: str, size):
+        self.width, self.height = size
+        self.fp = open(path, "wb")
+        self.fp.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0))
+        self._zlib = zlib.compressobj(6)
+        self._pending = bytearray()
+
+    def _chunk(self, kind: bytes, data: bytes):
+        self.fp.write(struct.pack(">I", len(data)) + kind + data)
+        self.fp.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)) & 0xFFFFFFFF))
+
+    def _emit(self, data: bytes, final=False):
+        self._pending += data
+        while len(self._pending) >= self.CHUNK_BYTES or (final and self._pending):
+            self._chunk(b"IDAT", bytes(self._pending[:self.CHUNK_BYTES]))
+            del self._pending[:self.CHUNK_BYTES]
+
+    def write(self, rows: np.ndarray):
+        # filter type 0 (None) in front of every scanline
+        lines = np.zeros((rows.shape[0], self.width * 3 + 1), dtype=np.uint8)
+        lines[:, 1:] = rows.reshape(rows.shape[0], -1)
+        self._emit(self._zlib.compress(lines))
+
+    def close(self):
+        self._emit(self._zlib.flush(), final=True)
+        self._chunk(b"IEND", b"")
+        self.fp.close()
+
+
+class PPMStripWriter:
+    """Writes binary PPM (P6) rows as they arrive."""
+
+    def __init__(self, path: str, size):
+        self.fp = open(path, "wb")
+        self.fp.write(b"P6\n%d %d\n255\n" % tuple(size))
+
+    def write(self, rows: np.ndarray):
+        self.fp.write(np.ascontiguousarray(rows).tobytes())
+
+    def close(self):
+        self.fp.close()
+
+
+STRIP_WRITERS = {".png": PNGStripWriter, ".ppm": PPMStripWriter}
+
+
+def bilinear_coefficients(in_size: int, out_size: int):
+    """Pillow's BILINEAR downscale weights along one axis.
+
+    Returns (first, count, weights): output i is the sum of inputs first[i] .. first[i] + count[i] - 1
+    times weights[i, :count[i]], in Pillow's 22-bit fixed point, computed exactly as Resample.c does.
+    """
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = filterscale
+    ksize = int(np.ceil(support)) * 2 + 1
+    center = (np.arange(out_size) + 0.5) * scale
+    first = np.maximum((center - support + 0.5).astype(np.int64), 0)
+    count = np.minimum((center + support + 0.5).astype(np.int64), in_size) - first
+    x = np.arange(ksize)
+    w = np.maximum(1.0 - np.abs((x[None, :] + first[:, None] - center[:, None] + 0.5) * (1.0 / filterscale)), 0.0)
+    w[x[None, :] >= count[:, None]] = 0.0
+    total = np.add.accumulate(w, axis=1)[:, -1:]  # sequential sum, like the C loop
+    w = np.divide(w, total, out=w, where=total != 0)
+    return first, count, (w * (1 << _PRECISION_BITS) + 0.5).astype(np.int64)
+
+
+def _vertical_pass(rows: np.ndarray, row0: int, first, count, weights, j0: int, j1: int) -> np.ndarray:
+    """Grid rows j0..j1 from horizontally resampled source rows starting at source row row0."""
+    acc = np.full((j1 - j0,) + rows.shape[1:], 1 << (_PRECISION_BITS - 1), dtype=np.int64)
+    for k in range(int(count[j0:j1].max())):
+        src = np.minimum(first[j0:j1] + k - row0, rows.shape[0] - 1)
+        acc += rows[src].astype(np.int64) * weights[j0:j1, k][:, None, None]
+    return np.clip(acc >> _PRECISION_BITS, 0, 255).astype(np.uint8)
+
+
+def _nearest_map(small: int, large: int) -> np.ndarray:
+    """Source index of every output pixel when Pillow NEAREST-resizes small -> large along one axis."""
+    index = Image.fromarray(np.arange(small, dtype=np.int32)[None, :], 'I')
+    return np.asarray(index.resize((large, 1), resample=Image.NEAREST))[0].astype(np.int64)
+
+
+def stream_style(in_path: str, out_path: str, style: str, pixel_size: int, options=None,
+                 strip_pixels=STREAM_STRIP_PIXELS, progress=None, dither=False):
+    """apply_style(img, style, pixel_size, dither, **options) without holding img or the result in memory.
+
+    Reads in_path a strip at a time and writes out_path (.png or .ppm) as it goes.
+    progress(rows_written, total_rows) is called after each strip.
+    """
+    if style not in STREAMABLE_STYLES:
+        raise ValueError(f"'{style}' needs the whole image; streaming supports: " + ", ".join(STREAMABLE_STYLES))
+    dither = dither_mode(dither)
+    if dither != "None" and dither not in BAYER_SIZES:
+        raise ValueError(f"{dither} dithering needs the whole image; use a Bayer dither for streaming")
+    writer_cls = STRIP_WRITERS.get(os.path.splitext(out_path)[1].lower())
+    if writer_cls is None:
+        raise ValueError("Streamed output must be .png or .ppm")
+    options = {k: v for k, v in (options or {}).items() if k != "grid_space"}
+
+    reader = RawStripReader(in_path)
+    w, h = reader.size
+    pixel_size = max(1, int(pixel_size))
+    grid_w, grid_h = max(1, w // pixel_size), max(1, h // pixel_size)
+    first, count, weights = bilinear_coefficients(h, grid_h)
+    row_map = _nearest_map(grid_h, h)
+    col_map = _nearest_map(grid_w, w)
+    grid_rows = max(1, strip_pixels // (w * pixel_size))
+
+    writer = writer_cls(out_path, (w, h))
+    try:
+        y_out = 0
+        for j0 in range(0, grid_h, grid_rows):
+            j1 = min(grid_h, j0 + grid_rows)
+            row0 = int(first[j0])
+            row1 = int((first[j0:j1] + count[j0:j1]).max())
+            strip = Image.fromarray(reader.read(row0, row1), 'RGB')
+            # horizontal pass is row-local, so Pillow gives the same rows as for the full image
+            rows = np.asarray(strip.resize((grid_w, row1 - row0), resample=Image.BILINEAR))
+            grid = Image.fromarray(_vertical_pass(rows, row0, first, count, weights, j0, j1), 'RGB')
+            grid = np.asarray(reduce_colors(grid, style, dither, dither_origin=(0, j0), **options).convert('RGB'))
+            y_end = h if j1 == grid_h else int(np.searchsorted(row_map, j1))
+            writer.write(grid[row_map[y_out:y_end] - j0][:, col_map])
+            y_out = y_end
+            if progress is not None:
+                progress(y_out, h)
+    except BaseException:
+        writer.close()
+        os.remove(out_path)
+        raise
+    finally:
+        reader.close()
+    writer.close()
+    return out_path